@@ -14,10 +14,26 @@ __license__ = "Python"
 
 ## All modules in this script are part of Python
 import argparse
+import collections
+import collections.abc
+import contextlib
 import os
+import threading
+import types
 import getpass
-import pprint
-import json
+
+
+# Result of check_envs for one variable, the fields match the keys of the check_env dictionary
+EnvCheck = collections.namedtuple('EnvCheck', ['NAME', 'EXISTS', 'EMPTY', 'VALID', 'VALUE'])
+
+# Difference between two environment snapshots, sorted lists of variable names
+EnvDiff = collections.namedtuple('EnvDiff', ['ADDED', 'REMOVED', 'CHANGED'])
+
+# Values of variables whose name contains one of these are masked when printed
+SENSITIVE_MARKERS = ('PASS', 'PWD', 'SECRET', 'TOKEN', 'KEY')
+
+# Marks a variable unset in an EnvOverlay layer
+_UNSET = object()
 
 
 # Setting environment variables via the Linux CLI
@@ -37,6 +53,9 @@ def all_env_vars(verbose=True):
     env_vars = os.environ
 
     if verbose:
+        # pprint is only needed for the printed output, scripts importing this module skip loading it
+        import pprint
+
         if "USER" in env_vars.keys():
             sys_user = os.environ['USER']
         elif "USERNAME" in env_vars.keys():
@@ -50,6 +69,78 @@ def all_env_vars(verbose=True):
     return dict(env_vars)
 
 
+def env_snapshot(environ=None):
+    """
+    :param environ: Optional dictionary of environment variables to snapshot instead of os.environ
+
+    Snapshot of the environment which keeps a hash of each value instead of the value itself, so snapshots are
+    cheap to keep around and never hold a copy of a password or key.
+
+    :return: dictionary of variable name to hash of its value
+    """
+    if environ is None:
+        environ = os.environ
+
+    return {env_var: hash(value) for env_var, value in environ.items()}
+
+
+def diff_env(before, after):
+    """
+    :param before: Snapshot returned by env_snapshot
+    :param after: Later snapshot returned by env_snapshot
+
+    Compare two snapshots with set operations on the (name, value hash) pairs so only the names which differ are
+    looked at one by one.
+
+    :return: EnvDiff with the ADDED, REMOVED and CHANGED variable names
+    """
+    if before == after:
+        return EnvDiff([], [], [])
+
+    # Names which are new or have a new value
+    updated = {env_var for env_var, value_hash in after.items() - before.items()}
+    added = updated - before.keys()
+
+    return EnvDiff(sorted(added), sorted(before.keys() - after.keys()), sorted(updated - added))
+
+
+def is_sensitive(env_var, sensitive=()):
+    """
+    :param env_var: Name of the environment variable
+    :param sensitive: Optional names which are always treated as sensitive
+    :return: True if the value of the variable should not be displayed
+    """
+    if env_var in sensitive:
+        return True
+    upper_name = env_var.upper()
+    return any(marker in upper_name for marker in SENSITIVE_MARKERS)
+
+
+def print_env_diff(diff, sensitive=(), environ=None):
+    """
+    :param diff: EnvDiff returned by diff_env
+    :param sensitive: Optional names whose values are masked in addition to the SENSITIVE_MARKERS names
+    :param environ: Optional dictionary with the current values instead of os.environ
+
+    Print only the variables which were added, removed or changed.  Values of sensitive variables are masked.
+    """
+    if environ is None:
+        environ = os.environ
+
+    if not (diff.ADDED or diff.REMOVED or diff.CHANGED):
+        print(f"\n======== NO CHANGES to Environment Variables ======== ")
+        return
+
+    print(f"\n======== CHANGED Environment Variables: {len(diff.ADDED)} added, {len(diff.REMOVED)} removed, "
+          f"{len(diff.CHANGED)} changed ======== ")
+    for action, env_vars in (("ADDED", diff.ADDED), ("CHANGED", diff.CHANGED)):
+        for env_var in env_vars:
+            value = "*******" if is_sensitive(env_var, sensitive) else environ.get(env_var)
+            print(f"\t{action} {env_var}={value}")
+    for env_var in diff.REMOVED:
+        print(f"\tREMOVED {env_var}")
+
+
 def check_env(env_var):
     """
     :param env_var: Name of environment variable to check for existence and validity
@@ -83,15 +174,229 @@ def check_env(env_var):
     return var_info
 
 
-def set_env(desc="Username", always_upper=True, sensitive=False, debug=True):
+def check_envs(env_vars, environ=None):
+    """
+    :param env_vars: Names of the environment variables to check for existence and validity
+    :param environ: Optional dictionary of environment variables to check instead of os.environ
+
+    Batch version of check_env.  The environment is copied once and every name is classified against that
+    snapshot, so checking thousands of names costs one dictionary lookup each instead of repeated os.environ
+    lookups and a new dictionary per name.
+
+    :return:
+    list of EnvCheck records in the order of env_vars.  Each record is one of
+    valid:   EXISTS True, EMPTY False, VALID True
+    empty:   EXISTS True, EMPTY True, VALID False
+    missing: EXISTS False, EMPTY False, VALID False, VALUE None
+    """
+    if environ is None:
+        environ = dict(os.environ)
+
+    checks = []
+    for env_var in env_vars:
+        value = environ.get(env_var)
+        if value:
+            checks.append(EnvCheck(env_var, True, False, True, value))
+        elif value is None:
+            checks.append(EnvCheck(env_var, False, False, False, None))
+        else:
+            checks.append(EnvCheck(env_var, True, True, False, value))
+
+    return checks
+
+
+def summarize_envs(checks):
+    """
+    :param checks: EnvCheck records returned by check_envs
+    :return: dictionary with the VALID, EMPTY (set to an empty string) and MISSING (not set) variable names
+    """
+    summary = {'VALID': [], 'EMPTY': [], 'MISSING': []}
+    for check in checks:
+        if check.VALID:
+            summary['VALID'].append(check.NAME)
+        elif check.EMPTY:
+            summary['EMPTY'].append(check.NAME)
+        else:
+            summary['MISSING'].append(check.NAME)
+
+    return summary
+
+
+class EnvOverlay(collections.abc.MutableMapping):
+    """
+    Copy on write view of the environment: the base mapping (os.environ) at the bottom with scoped layers of
+    variables on top.  Reads look through the layers from the top down, writes and deletes only go to the top layer,
+    so giving a host or a task its own credentials costs a small dictionary instead of a copy of the environment and
+    os.environ is never changed.
+
+    The overlay can be passed anywhere a mapping of environment variables is accepted, for example
+    env_creds.resolve_creds(nr, environ=overlay) or check_envs(names, environ=overlay).
+
+    Layers can be pushed and removed from several threads, each push returns the layer which is later removed by
+    identity.  The layers of one overlay are seen by every thread reading it, so threads which need different values
+    for the same variables (per host credentials in Nornir tasks) should each use their own EnvOverlay.
+
+    Usage:
+        overlay = EnvOverlay()
+        with overlay.layer(NETUSER='cisco', NETPASS='cisco'):
+            subprocess.run(cmd, env=overlay.environ())
+        with overlay.layer(DEVNET_SANDBOX_IOSXE_USR='developer'), overlay.applied():
+            # The overlay variables are written to os.environ in one batch and rolled back on exit
+            ...
+
+    :param base: Optional mapping to use instead of os.environ
+    """
+
+    def __init__(self, base=None):
+        self.base = os.environ if base is None else base
+        self.layers = [{}]
+        self._lock = threading.Lock()
+        # See environ: decoded copy of the base, the raw data it was taken from and the last merged environment
+        self._base_copy = None
+        self._base_raw = None
+        self._merged = None
+
+    def __getitem__(self, env_var):
+        for layer in reversed(list(self.layers)):
+            if env_var in layer:
+                value = layer[env_var]
+                if value is _UNSET:
+                    raise KeyError(env_var)
+                return value
+        return self.base[env_var]
+
+    def __setitem__(self, env_var, value):
+        self.layers[-1][env_var] = value
+
+    def __delitem__(self, env_var):
+        if env_var not in self:
+            raise KeyError(env_var)
+        self.layers[-1][env_var] = _UNSET
+
+    def __iter__(self):
+        seen = set()
+        for layer in reversed(list(self.layers)):
+            for env_var, value in layer.items():
+                if env_var not in seen:
+                    seen.add(env_var)
+                    if value is not _UNSET:
+                        yield env_var
+        for env_var in self.base:
+            if env_var not in seen:
+                yield env_var
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def overrides(self):
+        """
+        :return: dictionary of the variables the layers set, _UNSET for the ones they remove
+        """
+        merged = {}
+        for layer in list(self.layers):
+            merged.update(layer)
+        return merged
+
+    def push(self, values=None, **kwargs):
+        """
+        :return: the new layer, pass it to pop to remove this layer whatever was pushed after it
+        """
+        layer = dict(values or {}, **kwargs)
+        with self._lock:
+            self.layers.append(layer)
+        return layer
+
+    def pop(self, layer=None):
+        """
+        Remove a layer pushed earlier, the top layer when none is given.
+
+        :return: the layer removed
+        """
+        with self._lock:
+            if layer is None:
+                if len(self.layers) == 1:
+                    raise IndexError("The bottom layer of an EnvOverlay cannot be removed")
+                return self.layers.pop()
+            # By identity, another layer may hold the same values
+            for position in range(len(self.layers) - 1, 0, -1):
+                if self.layers[position] is layer:
+                    return self.layers.pop(position)
+        raise ValueError("The layer is not in this EnvOverlay")
+
+    @contextlib.contextmanager
+    def layer(self, values=None, **kwargs):
+        # Scoped layer, removed when the block exits even when other layers were pushed on top of it meanwhile
+        layer = self.push(values, **kwargs)
+        try:
+            yield self
+        finally:
+            self.pop(layer)
+
+    def _base_dict(self):
+        # Copy of the base as a plain dictionary, taken again only when the base changed.  Decoding os.environ into
+        # a dictionary is what makes dict(os.environ) slow, comparing its raw bytes with the last snapshot is not.
+        raw = self.base._data if self.base is os.environ else self.base
+        if self._base_copy is None or raw != self._base_raw:
+            self._base_raw = dict(raw)
+            self._base_copy = dict(self.base)
+            self._merged = None
+        return self._base_copy
+
+    def environ(self):
+        """
+        Merged environment for subprocess.run(env=...).  None (inherit the environment as is) when no layer changes
+        anything, otherwise a read only mapping of the base with the layers applied.
+
+        The merged mapping is kept until the layers or the base change, and a change of layers only copies the
+        cached plain dictionary of the base instead of reading the whole environment again.
+        """
+        overrides = self.overrides()
+        if not overrides:
+            return None
+        base = self._base_dict()
+        if self._merged is None or self._merged[0] != overrides:
+            merged = base.copy()
+            for env_var, value in overrides.items():
+                if value is _UNSET:
+                    merged.pop(env_var, None)
+                else:
+                    merged[env_var] = value
+            self._merged = (overrides, types.MappingProxyType(merged))
+        return self._merged[1]
+
+    @contextlib.contextmanager
+    def applied(self):
+        """
+        Write the variables of all the layers to the base mapping (os.environ) in one batch and restore the previous
+        values on exit, for code which only reads os.environ.  Only the overridden variables are touched.
+        """
+        saved = {}
+        try:
+            for env_var, value in self.overrides().items():
+                saved[env_var] = self.base.get(env_var, _UNSET)
+                if value is _UNSET:
+                    self.base.pop(env_var, None)
+                else:
+                    self.base[env_var] = value
+            yield self
+        finally:
+            for env_var, value in saved.items():
+                if value is _UNSET:
+                    self.base.pop(env_var, None)
+                else:
+                    self.base[env_var] = value
+
+
+def set_env(desc="Username", always_upper=True, sensitive=False, debug=True, environ=None):
     """
     Brief function to set environment variables (name/value) using the Python built in os module
 
-    The function has 4 optional parameters:
+    The function has 5 optional parameters:
     desc: Cosmetic message for the Input text to remind the user what key/value pair is being requested.
     Default: "Username"
     always_upper: Boolean used to convert the name to Uppercase to adhere to convention Default: True
     sensitive: Boolean used to
+    environ: Mapping to set the variable in, such as an EnvOverlay.  Default: os.environ
 
     Returns:
     os_var_valid; the variable is set and valid
@@ -111,10 +416,12 @@ def set_env(desc="Username", always_upper=True, sensitive=False, debug=True):
     if always_upper:
         env_var_name = env_var_name.upper()
 
-    # Set the environment variable in the Operating System
-    os.environ[env_var_name] = env_var_value
+    # Set the environment variable in the Operating System (or in the overlay)
+    if environ is None:
+        environ = os.environ
+    environ[env_var_name] = env_var_value
 
-    os_var_info_dict = check_env(env_var_name)
+    os_var_info_dict = check_envs([env_var_name], environ=environ)[0]._asdict()
 
     if debug:
         if sensitive:
@@ -125,28 +432,35 @@ def set_env(desc="Username", always_upper=True, sensitive=False, debug=True):
         else:
             if os_var_info_dict['VALID']:
                 print(f"\n======== ENV SET Environment Variable {env_var_name} set with valid value "
-                      f"{os.environ[env_var_name]} ========\n")
+                      f"{environ[env_var_name]} ========\n")
             else:
                 print(f"\n======== ERROR! Environment Variable {env_var_name} set but EMPTY! ========\n")
 
     return os_var_info_dict['VALID'], os_var_info_dict
 
 
-def unset_env(env_var=''):
+def unset_env(env_var='', environ=None):
     # Unsetting environment variables depends on OS feature support and may not have expected outcome
+    # Removing the variable through the os.environ mapping also unsets it in the process environment, calling
+    # os.unsetenv directly left os.environ (and check_env) reporting the old value
     if not env_var:
         env_var = input(f"\nPlease enter environment variable name to UNSET: ")
-    os.putenv(env_var, '')
+    if environ is None:
+        environ = os.environ
 
-    return os.unsetenv(env_var)
+    # Return the removed value, None if the variable was not set
+    return environ.pop(env_var, None)
 
 
 def main():
 
-    print(f"\nCurrent Environment Variables:")
-    env_vars_dict = all_env_vars()
-    # evars_json = json.dumps(evars, indent=4, sort_keys=True)
-    # print(evars_json)
+    # Only the variables set below are printed at the end, the whole environment is listed with the -a option
+    before = env_snapshot()
+    if arguments.all_vars:
+        print(f"\nCurrent Environment Variables:")
+        all_env_vars()
+    else:
+        print(f"\nCurrent Environment has {len(before)} variables (use -a to list them)")
 
     # Call the set_env function, by default the description of the environment variable is "Username". 
     # There is nothing special about this description value.
@@ -155,18 +469,18 @@ def main():
     
     # Call the set_env function with a description indicating we are setting a password and set the
     # sensitive option to true so that the password can be typed in securely without echo to the screen
-    set_env(desc="Password", sensitive=True)
+    pwd_valid, pwd_info_dict = set_env(desc="Password", sensitive=True)
 
-    env_vars_dict = all_env_vars(verbose=False)
     print(f"\nUPDATED Environment Variables:")
-    env_vars_json = json.dumps(env_vars_dict, indent=4, sort_keys=True)
-    print(env_vars_json)
+    print_env_diff(diff_env(before, env_snapshot()), sensitive={pwd_info_dict['NAME']})
 
 
 # Standard call to the main() function.
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Script Description",
                                      epilog="Usage: ' python add_2env.py' ")
+    parser.add_argument('-a', '--all_vars', action='store_true', default=False,
+                        help='List all the current environment variables before setting new ones')
 
     arguments = parser.parse_args()
     main()
@@ -0,0 +1,39 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: base_processor
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+
+class BaseProcessor(object):
+    """
+    Nornir processor whose events do nothing.  Nornir calls every method of the processor interface, so the
+    processors in this repository (result_sink.JsonLinesSink, fact_cache.FactCache, fact_store.FactStore and
+    parse_pool.ParsePipeline) subclass it and only override the events they use.
+    """
+
+    def task_started(self, task):
+        pass
+
+    def task_completed(self, task, result):
+        pass
+
+    def task_instance_started(self, task, host):
+        pass
+
+    def task_instance_completed(self, task, host, result):
+        pass
+
+    def subtask_instance_started(self, task, host):
+        pass
+
+    def subtask_instance_completed(self, task, host, result):
+        pass
@@ -0,0 +1,64 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: batch_collect
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+from nornir.core.task import Result
+
+
+def collect_batch(task, getters=None, commands=None, getters_options=None):
+    """
+    Nornir task which runs a whole list of napalm getters and CLI commands over one connection per host.
+
+    The napalm connection is opened through task.host.get_connection, so it is kept in the host's connection pool
+    and reused by any later task in the same process (including napalm_get) until nr.close_connections() is called.
+    CLI commands go through the napalm driver's cli() method on that same session instead of opening a separate
+    netmiko connection the way netmiko_send_command does.
+
+    Usage:
+        result = nr.run(collect_batch, getters=['get_facts', 'get_interfaces'], commands=['show version'])
+
+    :param getters: List of napalm getters, with or without the get_ prefix
+    :param commands: List of CLI commands
+    :param getters_options: Optional dictionary of getter name to keyword arguments for that getter
+    :return: Result whose result is a dictionary keyed by getter name and by CLI command.  A getter or command which
+    raised has {"error": "<exception>"} as its value and is listed in the errors attribute of the Result, the others
+    are kept.  The Result is failed only when every getter and command raised.
+    """
+    device = task.host.get_connection("napalm", task.nornir.config)
+    getters_options = getters_options or {}
+
+    result = {}
+    errors = {}
+    for g in getters or []:
+        getter = g if g.startswith("get_") else f"get_{g}"
+        try:
+            result[g] = getattr(device, getter)(**getters_options.get(g, {}))
+        except Exception as e:
+            errors[g] = f"{type(e).__name__}: {e}"
+
+    if commands:
+        # One cli() call sends every command over the open session, when it fails the commands are retried one by
+        # one so a single bad command does not lose the output of the others
+        try:
+            result.update(device.cli(list(commands)))
+        except Exception:
+            for command in commands:
+                try:
+                    result.update(device.cli([command]))
+                except Exception as e:
+                    errors[command] = f"{type(e).__name__}: {e}"
+
+    for name, error in errors.items():
+        result[name] = {"error": error}
+
+    return Result(host=task.host, result=result, failed=bool(errors) and len(errors) == len(result), errors=errors)
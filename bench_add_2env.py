@@ -0,0 +1,168 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: bench_add_2env
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import pprint
+import time
+
+import add_2env
+
+
+@contextlib.contextmanager
+def synthetic_env(num_vars, prefix="BENCH_ENV"):
+    """
+    Set num_vars synthetic environment variables for the duration of the block.  One in ten is set but empty.
+
+    :return: list of num_vars names that are set plus num_vars // 2 names that are not
+    """
+    names = [f"{prefix}_{i}" for i in range(num_vars)]
+    for i, name in enumerate(names):
+        os.environ[name] = "" if i % 10 == 0 else f"value{i}"
+    try:
+        yield names + [f"{prefix}_MISSING_{i}" for i in range(num_vars // 2)]
+    finally:
+        for name in names:
+            del os.environ[name]
+
+
+def best_time(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_check_envs(sizes, repeat=5):
+
+    print(f"\n============= check_env loop vs check_envs (best of {repeat}) =============")
+    print(f"{'names':>8} {'loop ms':>10} {'batch ms':>10} {'speedup':>8}")
+
+    for num_vars in sizes:
+        with synthetic_env(num_vars) as names:
+            loop = [add_2env.check_env(name) for name in names]
+            batch = add_2env.check_envs(names)
+            # Same classification as the per variable function
+            assert [check._asdict() for check in batch] == loop
+
+            loop_time = best_time(lambda: [add_2env.check_env(name) for name in names], repeat)
+            batch_time = best_time(lambda: add_2env.check_envs(names), repeat)
+
+        print(f"{len(names):>8} {loop_time * 1000:>10.2f} {batch_time * 1000:>10.2f} {loop_time / batch_time:>7.1f}x")
+
+
+def full_dump(change):
+    # What add_2env.main used to do: copy and print the whole environment before and after the change
+    with contextlib.redirect_stdout(io.StringIO()):
+        pprint.pprint(dict(os.environ), width=4)
+        change()
+        print(json.dumps(dict(os.environ), indent=4, sort_keys=True))
+
+
+def snapshot_diff(change):
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = add_2env.env_snapshot()
+        change()
+        add_2env.print_env_diff(add_2env.diff_env(before, add_2env.env_snapshot()))
+
+
+def bench_env_diff(sizes, repeat=5):
+
+    print(f"\n============= Full before/after dump vs snapshot diff (best of {repeat}) =============")
+    print(f"{'env vars':>8} {'dump ms':>10} {'diff ms':>10} {'speedup':>8}")
+
+    def change():
+        # One variable added, one changed and one removed each time
+        os.environ["BENCH_ENV_ADDED"] = "added"
+        os.environ["BENCH_ENV_1"] = str(time.perf_counter())
+        os.environ.pop("BENCH_ENV_2", None)
+
+    for num_vars in sizes:
+        with synthetic_env(num_vars):
+            dump_time = best_time(lambda: full_dump(change), repeat)
+            diff_time = best_time(lambda: snapshot_diff(change), repeat)
+            os.environ.pop("BENCH_ENV_ADDED")
+            os.environ["BENCH_ENV_2"] = "restored"
+
+        print(f"{len(os.environ) + num_vars:>8} {dump_time * 1000:>10.2f} {diff_time * 1000:>10.2f} "
+              f"{dump_time / diff_time:>7.1f}x")
+
+
+def bench_overlay(sizes, num_tasks=100, repeat=5):
+
+    print(f"\n============= Per task credentials: environment copy vs EnvOverlay layer ({num_tasks} tasks) =============")
+    print(f"{'env vars':>8} {'copy ms':>10} {'layer ms':>10} {'speedup':>8} {'environ ms':>11} {'speedup':>8}")
+
+    def copy_per_task():
+        for i in range(num_tasks):
+            env = dict(os.environ)
+            env.update({"NETUSER": f"user{i}", "NETPASS": f"pass{i}"})
+            assert env["NETUSER"] == f"user{i}"
+
+    overlay = add_2env.EnvOverlay()
+
+    def layer_per_task():
+        for i in range(num_tasks):
+            with overlay.layer(NETUSER=f"user{i}", NETPASS=f"pass{i}"):
+                assert overlay["NETUSER"] == f"user{i}"
+
+    def environ_per_task():
+        # Subprocess handoff: the merged mapping that would go to subprocess.run(env=...)
+        for i in range(num_tasks):
+            with overlay.layer(NETUSER=f"user{i}", NETPASS=f"pass{i}"):
+                assert overlay.environ()["NETUSER"] == f"user{i}"
+
+    for num_vars in sizes:
+        with synthetic_env(num_vars):
+            copy_time = best_time(copy_per_task, repeat)
+            layer_time = best_time(layer_per_task, repeat)
+            environ_time = best_time(environ_per_task, repeat)
+
+        print(f"{len(os.environ) + num_vars:>8} {copy_time * 1000:>10.2f} {layer_time * 1000:>10.2f} "
+              f"{copy_time / layer_time:>7.1f}x {environ_time * 1000:>11.2f} {copy_time / environ_time:>7.1f}x")
+
+
+def main():
+
+    bench_check_envs(arguments.num_vars, repeat=arguments.repeat)
+
+    if arguments.diff:
+        bench_env_diff(arguments.env_sizes, repeat=arguments.repeat)
+
+    if arguments.overlay:
+        bench_overlay(arguments.env_sizes, repeat=arguments.repeat)
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for the add_2env.py environment functions",
+                                     epilog="Usage: ' python bench_add_2env.py -n 100 1000 10000' or "
+                                            "' python bench_add_2env.py -d -e 1000 10000 50000' ")
+    parser.add_argument('-n', '--num_vars', nargs='+', type=int, default=[100, 1000, 10000],
+                        help='Number of synthetic environment variables to set and check')
+    parser.add_argument('-d', '--diff', action='store_true', default=False,
+                        help='Compare the full before/after environment dump with the snapshot diff')
+    parser.add_argument('-o', '--overlay', action='store_true', default=False,
+                        help='Compare a copy of the environment per task with a per task EnvOverlay layer')
+    parser.add_argument('-e', '--env_sizes', nargs='+', type=int, default=[1000, 10000, 50000],
+                        help='With -d or -o, number of synthetic environment variables in the environment')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions, the best time is reported')
+    arguments = parser.parse_args()
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: bench_dotenv
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import decouple
+import dotenv
+
+import dotenv_loader
+import load_env_decouple
+
+
+def write_env_file(path, num_keys):
+    """
+    Write a synthetic .env file with a mix of string, integer, boolean and comma separated values.
+
+    :return: list of (key, cast) pairs matching the values written
+    """
+    keys = []
+    with open(path, "w") as f:
+        for i in range(num_keys):
+            kind = i % 4
+            if kind == 0:
+                f.write(f"BENCH_STR_{i}=value{i}\n")
+                keys.append((f"BENCH_STR_{i}", decouple.undefined))
+            elif kind == 1:
+                f.write(f"BENCH_INT_{i}={i}\n")
+                keys.append((f"BENCH_INT_{i}", int))
+            elif kind == 2:
+                f.write(f"BENCH_BOOL_{i}={'True' if i % 8 == 2 else 'off'}\n")
+                keys.append((f"BENCH_BOOL_{i}", bool))
+            else:
+                f.write(f"BENCH_CSV_{i}=a{i}, b{i}, c{i}\n")
+                keys.append((f"BENCH_CSV_{i}", load_env_decouple.CSV))
+    return keys
+
+
+def bench_config_lookups(sizes, num_reads, seed=1):
+
+    print(f"\n============= decouple.Config vs ConfigSnapshot ({num_reads} typed reads) =============")
+    print(f"{'keys':>8} {'decouple ms':>12} {'snapshot ms':>12} {'ns/read':>10} {'speedup':>8}")
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, ".env")
+        for num_keys in sizes:
+            keys = write_env_file(path, num_keys)
+            reads = [rng.choice(keys) for _ in range(num_reads)]
+
+            # decouple.config is a decouple.Config on the .env file once it has found the file
+            config = decouple.Config(decouple.RepositoryEnv(path))
+            start = time.perf_counter()
+            expected = [config(key, cast=cast) for key, cast in reads]
+            decouple_time = time.perf_counter() - start
+
+            # Loading the file is included in the snapshot time
+            start = time.perf_counter()
+            snapshot = load_env_decouple.ConfigSnapshot(path)
+            values = [snapshot(key, cast=cast) for key, cast in reads]
+            snapshot_time = time.perf_counter() - start
+
+            assert expected == values
+            print(f"{num_keys:>8} {decouple_time * 1000:>12.2f} {snapshot_time * 1000:>12.2f} "
+                  f"{snapshot_time / num_reads * 1e9:>10.0f} {decouple_time / snapshot_time:>7.1f}x")
+
+
+def bench_loader(sizes, repeat=3):
+
+    print(f"\n============= dotenv.load_dotenv vs DotenvLoader (best of {repeat}) =============")
+    print(f"{'lines':>8} {'dotenv ms':>10} {'load ms':>10} {'unchanged ms':>13} {'1 change ms':>12} {'speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, ".env")
+        for num_keys in sizes:
+            keys = write_env_file(path, num_keys)
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+            dotenv_time = load_time = unchanged_time = change_time = None
+            for i in range(repeat):
+                start = time.perf_counter()
+                dotenv.load_dotenv(path, override=True)
+                elapsed = time.perf_counter() - start
+                dotenv_time = elapsed if dotenv_time is None else min(dotenv_time, elapsed)
+                expected = {key: os.environ.pop(key) for key, cast in keys}
+
+                loader = dotenv_loader.DotenvLoader(path, override=True)
+                start = time.perf_counter()
+                loader.load()
+                elapsed = time.perf_counter() - start
+                load_time = elapsed if load_time is None else min(load_time, elapsed)
+                assert {key: os.environ[key] for key, cast in keys} == expected
+
+                start = time.perf_counter()
+                assert loader.load() is None
+                elapsed = time.perf_counter() - start
+                unchanged_time = elapsed if unchanged_time is None else min(unchanged_time, elapsed)
+
+                # Rewrite the file with one value changed, as a generator would
+                lines[0] = f"BENCH_STR_0=changed{i}"
+                with open(path, "w") as f:
+                    f.write("\n".join(lines) + "\n")
+                start = time.perf_counter()
+                diff = loader.load()
+                elapsed = time.perf_counter() - start
+                change_time = elapsed if change_time is None else min(change_time, elapsed)
+                assert diff.CHANGED == ["BENCH_STR_0"] and os.environ["BENCH_STR_0"] == f"changed{i}"
+
+                for key, cast in keys:
+                    del os.environ[key]
+
+            print(f"{num_keys:>8} {dotenv_time * 1000:>10.2f} {load_time * 1000:>10.2f} "
+                  f"{unchanged_time * 1000:>13.3f} {change_time * 1000:>12.2f} {dotenv_time / load_time:>7.1f}x")
+
+
+def main():
+
+    bench_config_lookups(arguments.num_keys, arguments.reads)
+
+    if arguments.loader:
+        bench_loader(arguments.lines)
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for loading and reading .env files",
+                                     epilog="Usage: ' python bench_dotenv.py -n 100 1000 10000 -R 100000' or "
+                                            "' python bench_dotenv.py -l -L 1000 5000 10000' ")
+    parser.add_argument('-n', '--num_keys', nargs='+', type=int, default=[100, 1000, 10000],
+                        help='Number of keys in the synthetic .env file')
+    parser.add_argument('-l', '--loader', action='store_true', default=False,
+                        help='Compare dotenv.load_dotenv with the incremental DotenvLoader on large .env files')
+    parser.add_argument('-L', '--lines', nargs='+', type=int, default=[1000, 5000, 10000],
+                        help='With -l, number of lines in the synthetic .env files')
+    parser.add_argument('-R', '--reads', type=int, default=100000, help='Number of typed reads of random keys')
+    arguments = parser.parse_args()
+    main()
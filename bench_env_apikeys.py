@@ -0,0 +1,310 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: bench_env_apikeys
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import collections
+import http.server
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import requests
+
+import env_apikeys
+import geo_cache
+import iss_track
+
+# Canned open-notify responses served by the stand-in server
+ASTROS = {"message": "success", "number": 2,
+          "people": [{"craft": "ISS", "name": "Stand-in One"}, {"craft": "ISS", "name": "Stand-in Two"}]}
+PASSES = {"message": "success", "request": {"latitude": 45.0, "longitude": -122.3, "altitude": 20, "passes": 5},
+          "response": [{"duration": 600, "risetime": 1600000000 + 5400 * i} for i in range(5)]}
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    # Keep-alive, so pooled sessions can reuse their connections.  Without TCP_NODELAY the separate header and body
+    # writes of a reused connection wait on delayed ACKs.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+
+        if url.path == "/astros.json":
+            self._reply(200, ASTROS)
+        elif url.path == "/iss-pass.json":
+            self._reply(200, PASSES)
+        elif url.path == "/iss-now.json":
+            # The position moves a little with every request, like the real ISS
+            step = self.server.requests
+            self._reply(200, {"message": "success", "timestamp": 1600000000 + step,
+                              "iss_position": {"latitude": f"{(step * 0.5) % 180 - 90:.4f}",
+                                               "longitude": f"{(step * 4.0) % 360 - 180:.4f}"}})
+        elif url.path == "/v1/revgeocode" and not self.server.admit():
+            self._reply(429, {"status": 429, "title": "Too Many Requests"})
+        elif url.path == "/v1/revgeocode" and random.random() < self.server.error_rate:
+            # An HTML error page, like the ones returned by the load balancers in front of the API
+            self._reply(503, "<html><body><h1>503 Service Unavailable</h1></body></html>", "text/html")
+        elif url.path == "/v1/revgeocode":
+            # Coarse stand-in for the HERE API: land between 20 W and 60 E below 70 degrees of latitude, else ocean
+            lat, lng = (float(value) for value in urllib.parse.parse_qs(url.query)["at"][0].split(","))
+            items = []
+            if -20.0 <= lng <= 60.0 and abs(lat) <= 70.0:
+                items.append({"title": "Stand-in", "address": {"countryName": "Standinland",
+                                                               "label": f"Stand-in cell {lat:.1f},{lng:.1f}"}})
+            self._reply(200, {"items": items})
+        else:
+            self._reply(404, {"message": f"{url.path} not found"})
+
+    def _reply(self, status, body, content_type="application/json"):
+        data = (body if isinstance(body, str) else json.dumps(body)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """
+    Local stand-in for the open-notify and HERE reverse geocode APIs with a fixed latency added to every response.
+    Reverse geocode calls over quota in the last second are answered 429, and a fraction error_rate 503.
+
+    Usage:
+        with StandInServer(latency=0.2) as server:
+            env_apikeys.iss_info(base_url=server.url)
+
+    :param latency: Seconds added to every response
+    :param quota: Reverse geocode calls allowed per second, None for no limit
+    :param error_rate: Fraction of reverse geocode calls answered 503
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.1, handler=StandInHandler, quota=None, error_rate=0.0):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.quota = quota
+        self.error_rate = error_rate
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._window = collections.deque()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def admit(self):
+        # Sliding one second window, like the per second quota of the HERE plans
+        if self.quota is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 1.0:
+                self._window.popleft()
+            if len(self._window) >= self.quota:
+                return False
+            self._window.append(now)
+            return True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        self.server_close()
+
+
+def sequential_iss_info(base_url):
+    # What iss_info used to do: three requests one after the other, each on a new connection
+    responses = {}
+    for name in ("astros", "pass", "position"):
+        responses[name] = requests.get(base_url + env_apikeys.ISS_ENDPOINTS[name])
+    return responses
+
+
+def bench_iss_info(latency, repeat=5):
+
+    print(f"\n============= iss_info against the stand-in server ({latency * 1000:.0f} ms latency, "
+          f"best of {repeat}) =============")
+    print(f"{'variant':>32} {'wall ms':>10} {'requests':>9}")
+
+    with StandInServer(latency=latency) as server:
+        variants = (
+            ("sequential, new connections", lambda: sequential_iss_info(server.url)),
+            ("concurrent, pooled session", lambda: env_apikeys.fetch_iss_data(base_url=server.url)),
+            ("position only", lambda: env_apikeys.fetch_iss_data(("position",), base_url=server.url)),
+        )
+        baseline = None
+        for name, func in variants:
+            best = None
+            for _ in range(repeat):
+                start_requests = server.requests
+                start = time.perf_counter()
+                responses = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                assert all(response.status_code == 200 for response in responses.values())
+                num_requests = server.requests - start_requests
+            baseline = baseline or best
+            print(f"{name:>32} {best * 1000:>10.1f} {num_requests:>9}  ({baseline / best:.1f}x)")
+
+        # The public helpers return the same data as before
+        latitude, longitude = env_apikeys.get_iss_location(base_url=server.url)
+        assert env_apikeys.iss_info(base_url=server.url)["position"].json()["message"] == "success"
+        print(f"\nget_iss_location from the stand-in server: latitude {latitude} longitude {longitude}")
+
+
+def ground_track(num_points, interval=0.5, start_lng=-25.0):
+    """
+    Approximate ISS ground track: 51.6 degrees inclination, one orbit every 92.7 minutes (about 7.7 km/s).  The
+    default start crosses from the ocean to land on the stand-in server.
+
+    :param interval: Seconds between two positions, like polling get_iss_location
+    :return: list of (latitude, longitude) strings formatted like the open-notify API
+    """
+    points = []
+    for i in range(num_points):
+        phase = 2 * math.pi * i * interval / (92.7 * 60)
+        lat = 51.6 * math.sin(phase)
+        lng = (start_lng + i * interval * 360 / (92.7 * 60) * 1.07 + 180) % 360 - 180
+        points.append((f"{lat:.4f}", f"{lng:.4f}"))
+    return points
+
+
+def bench_geo_cache(latency, precisions, num_points=300, interval=0.5):
+
+    print(f"\n============= Reverse geocode cache on {num_points} ISS positions {interval} s apart "
+          f"({latency * 1000:.0f} ms latency) =============")
+    print(f"{'variant':>24} {'wall ms':>10} {'API calls':>10} {'hit rate':>9} {'cells':>6} {'wrong':>6}")
+
+    points = ground_track(num_points, interval)
+    with StandInServer(latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+        url = server.url + "/v1/revgeocode"
+
+        def run(cache):
+            start_requests = server.requests
+            start = time.perf_counter()
+            results = [env_apikeys.reverse_geocode(lat, lng, "standin", cache=cache, base_url=url)[1]
+                       for lat, lng in points]
+            return time.perf_counter() - start, server.requests - start_requests, results
+
+        baseline, num_requests, expected = run(None)
+        print(f"{'no cache':>24} {baseline * 1000:>10.1f} {num_requests:>10}")
+
+        for precision in precisions:
+            path = os.path.join(directory, f"geocode_cache_{precision}.json")
+            cache = geo_cache.GeocodeCache(path, precision=precision)
+            elapsed, num_requests, results = run(cache)
+            # The cached answer is the one of the first point looked up in the cell, land or water must match
+            mismatches = sum(bool(a["items"]) != bool(b["items"]) for a, b in zip(expected, results))
+            cache.save()
+            stats = cache.stats()
+            print(f"{'precision ' + str(precision):>24} {elapsed * 1000:>10.1f} {num_requests:>10} "
+                  f"{stats['HIT_RATE']:>9.1%} {stats['ENTRIES']:>6} {mismatches:>6}  ({baseline / elapsed:.1f}x)")
+
+            # Same track again from the saved file, as a later run of env_apikeys.py -g would
+            cache = geo_cache.GeocodeCache(path, precision=precision)
+            elapsed, num_requests, results = run(cache)
+            print(f"{'  reloaded from file':>24} {elapsed * 1000:>10.1f} {num_requests:>10} "
+                  f"{cache.stats()['HIT_RATE']:>9.1%} {len(cache):>6} {'':>6}  ({baseline / elapsed:.1f}x)")
+
+    print(f"\n{sum(not result['items'] for result in expected)} of {num_points} positions are over water.  wrong: "
+          f"positions answered land instead of water or the reverse because their cell was first looked up on the "
+          f"other side of the coast")
+
+
+def bench_track(latency, quota, num_points=200, interval=2.0, workers=8, error_rate=0.02):
+
+    print(f"\n============= Ground track of {num_points} positions, quota {quota:g} calls/s "
+          f"({latency * 1000:.0f} ms latency, {error_rate:.0%} 503) =============")
+    print(f"{'variant':>32} {'wall s':>8} {'lookups/s':>10} {'API calls':>10} {'429':>6} {'failed':>7}")
+
+    points = ground_track(num_points, interval)
+    with StandInServer(latency=latency, quota=quota, error_rate=error_rate) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        url = server.url + "/v1/revgeocode"
+        output = os.path.join(directory, "iss_track.jsonl")
+
+        # What calling check_iss_location for each position does: one call after the other, no retries
+        start_requests = server.requests
+        start = time.perf_counter()
+        statuses = [env_apikeys.reverse_geocode(lat, lng, "standin", base_url=url)[0] for lat, lng in points]
+        elapsed = time.perf_counter() - start
+        print(f"{'sequential':>32} {elapsed:>8.2f} {len(points) / elapsed:>10.1f} "
+              f"{server.requests - start_requests:>10} {statuses.count(429):>6} "
+              f"{sum(status != 200 for status in statuses):>7}")
+
+        variants = (
+            (f"{workers} workers, no limiter", dict(rate=1e9, workers=workers)),
+            (f"{workers} workers, token bucket", dict(rate=quota, workers=workers)),
+            (f"{workers} workers, bucket, precision 4", dict(rate=quota, workers=workers, precision=4)),
+        )
+        for name, options in variants:
+            stats = iss_track.geocode_track(points, "standin", output, base_url=url, **options)
+            lookups = stats['GEOCODED'] + stats['CACHED'] + stats['FAILED']
+            with open(output) as f:
+                assert sum(1 for line in f) == lookups
+            print(f"{name:>32} {stats['ELAPSED']:>8.2f} {lookups / stats['ELAPSED']:>10.1f} {stats['REQUESTS']:>10} "
+                  f"{stats['THROTTLED']:>6} {stats['FAILED']:>7}")
+
+    print(f"\nThe ideal at the quota is {quota:g} lookups/s.  With precision 4 positions in the same 39 x 20 km cell "
+          f"are deduplicated before any call is made.")
+
+
+def main():
+
+    bench_iss_info(arguments.latency, repeat=arguments.repeat)
+
+    if arguments.geo_cache:
+        bench_geo_cache(arguments.latency, arguments.precisions, num_points=arguments.points,
+                        interval=arguments.interval)
+
+    if arguments.track:
+        bench_track(arguments.latency, arguments.quota, num_points=arguments.points, workers=arguments.workers)
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for the env_apikeys API calls against a local stand-in "
+                                                 "server (no Internet access or API key needed)",
+                                     epilog="Usage: ' python bench_env_apikeys.py -L 0.2' or "
+                                            "' python bench_env_apikeys.py -g -P 4 5 6 -i 0.5' or "
+                                            "' python bench_env_apikeys.py -t -q 20 -n 200' ")
+    parser.add_argument('-L', '--latency', type=float, default=0.1,
+                        help='Seconds of latency the stand-in server adds to every response')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions, the best time is reported')
+    parser.add_argument('-g', '--geo_cache', action='store_true', default=False,
+                        help='Reverse geocode an ISS ground track with and without the geo_cache.GeocodeCache')
+    parser.add_argument('-P', '--precisions', nargs='+', type=int, default=[4, 5, 6],
+                        help='With -g, geohash precisions of the cache to compare')
+    parser.add_argument('-t', '--track', action='store_true', default=False,
+                        help='Throughput of the iss_track ground track pipeline against a stand-in quota')
+    parser.add_argument('-q', '--quota', type=float, default=20.0,
+                        help='With -t, reverse geocode calls per second allowed by the stand-in server')
+    parser.add_argument('-w', '--workers', type=int, default=8, help='With -t, concurrent reverse geocode calls')
+    parser.add_argument('-n', '--points', type=int, default=300, help='With -g or -t, number of ISS positions')
+    parser.add_argument('-i', '--interval', type=float, default=0.5, help='With -g, seconds between two positions')
+    arguments = parser.parse_args()
+    main()
@@ -0,0 +1,622 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: bench_env_creds
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import contextlib
+import io
+import logging
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+warnings.filterwarnings('ignore')
+
+import yaml
+
+from nornir import InitNornir
+from nornir.plugins.tasks.networking import napalm_get
+
+import cred_preflight
+import cred_vault
+import env_creds
+import fact_store
+import fake_napalm
+import host_scheduler
+import inventory_cache
+import inventory_index
+import parse_pool
+import result_sink
+
+
+# Nornir logging is disabled for the benchmarks, keep the injected failures from reaching stderr
+logging.getLogger("nornir").addHandler(logging.NullHandler())
+
+
+def build_inventory(num_hosts, num_groups=10, host_env_ratio=0.1, shared_host_creds=False):
+    """
+    Build a synthetic Nornir inventory and the matching credential environment variables.
+
+    :param num_hosts: Number of hosts to generate
+    :param num_groups: Number of groups the hosts are spread across
+    :param host_env_ratio: Fraction of hosts which get their own <NAME>_USR/<NAME>_PWD pair
+    :param shared_host_creds: When True host environment variables repeat their group credentials
+    :return: hosts dictionary, groups dictionary, environment variable dictionary
+    """
+    groups = {f"bench_group_{g}": {"platform": "ios"} for g in range(num_groups)}
+    hosts = {}
+    env_vars = {"NETUSER": "bench_default", "NETPASS": "bench_default_pwd"}
+
+    for g in range(num_groups):
+        env_vars[f"BENCH_GROUP_{g}_USR"] = f"group_{g}"
+        env_vars[f"BENCH_GROUP_{g}_PWD"] = f"group_{g}_pwd"
+
+    host_env_every = int(1 / host_env_ratio) if host_env_ratio else 0
+    for h in range(num_hosts):
+        name = f"bench_host_{h}"
+        hosts[name] = {"hostname": f"10.{h // 65536 % 256}.{h // 256 % 256}.{h % 256}",
+                       "groups": [f"bench_group_{h % num_groups}"]}
+        if host_env_every and h % host_env_every == 0:
+            cred_name = f"group_{h % num_groups}" if shared_host_creds else f"host_{h}"
+            env_vars[f"BENCH_HOST_{h}_USR"] = cred_name
+            env_vars[f"BENCH_HOST_{h}_PWD"] = f"{cred_name}_pwd"
+
+    return hosts, groups, env_vars
+
+
+def init_nornir(hosts, groups, defaults=None, num_workers=100):
+    # Synthetic inventories are passed straight to SimpleInventory so no YAML files are involved
+    fake_napalm.restore_napalm()
+    return InitNornir(core={"num_workers": num_workers},
+                      inventory={"plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                                 "options": {"hosts": hosts, "groups": groups, "defaults": defaults or {}}},
+                      logging={"enabled": False})
+
+
+def per_object_creds(nr):
+    # The per object path: one set_creds call (env lookups and prints) for every group and host
+    with contextlib.redirect_stdout(io.StringIO()):
+        env_creds.set_creds(nr)
+        for name, group in nr.inventory.groups.items():
+            env_creds.set_creds(group, prefix=name, context="group")
+        for name, host in nr.inventory.hosts.items():
+            env_creds.set_creds(host, prefix=name, context="device")
+
+
+def bench_resolve_creds(sizes, num_groups=10):
+
+    print(f"\n======== Credential resolution time by host count ({num_groups} groups) ========")
+    print(f"{'hosts':>10} {'per object (s)':>16} {'bulk (s)':>12} {'speedup':>10} {'missing':>8}")
+
+    for size in sizes:
+        hosts, groups, env_vars = build_inventory(size, num_groups)
+        os.environ.update(env_vars)
+
+        nr = init_nornir(hosts, groups)
+        start = time.perf_counter()
+        per_object_creds(nr)
+        per_object = time.perf_counter() - start
+
+        nr = init_nornir(hosts, groups)
+        summary = env_creds.resolve_creds(nr)
+        bulk = summary['ELAPSED']
+
+        print(f"{size:>10} {per_object:>16.4f} {bulk:>12.4f} {per_object / bulk:>9.1f}x {len(summary['MISSING']):>8}")
+
+        for key in env_vars:
+            os.environ.pop(key, None)
+
+
+def bench_inherit_creds(sizes, num_groups=10):
+
+    print(f"\n======== Credential inheritance by host count ({num_groups} groups) ========")
+    print(f"{'hosts':>10} {'time (s)':>10} {'per object strings':>20} {'interned strings':>18} {'unique creds':>14}")
+
+    for size in sizes:
+        # Every host has its own environment variables, repeating one of a few group passwords
+        hosts, groups, env_vars = build_inventory(size, num_groups, host_env_ratio=1, shared_host_creds=True)
+        os.environ.update(env_vars)
+
+        # Every set_creds call stores its own copy of the strings read from the environment
+        nr = init_nornir(hosts, groups)
+        per_object_creds(nr)
+        per_object_strings = len({id(h.password) for h in nr.inventory.hosts.values()})
+
+        nr = init_nornir(hosts, groups)
+        env_creds.resolve_creds(nr)
+        start = time.perf_counter()
+        summary = env_creds.inherit_creds(nr)
+        elapsed = time.perf_counter() - start
+        interned_strings = len({id(h.password) for h in nr.inventory.hosts.values()})
+
+        print(f"{size:>10} {elapsed:>10.4f} {per_object_strings:>20} {interned_strings:>18} {summary['UNIQUE']:>14}")
+
+        for key in env_vars:
+            os.environ.pop(key, None)
+
+
+def bench_vault(sizes, num_groups=10):
+
+    print(f"\n======== Bulk resolution from environment variables vs the encrypted vault ({num_groups} groups) ========")
+    print(f"{'hosts':>10} {'env (s)':>10} {'vault (s)':>10} {'decrypts':>9} {'cached lookup (us)':>19} {'missing':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            hosts, groups, env_vars = build_inventory(size, num_groups)
+
+            os.environ.update(env_vars)
+            nr = init_nornir(hosts, groups)
+            env_time = env_creds.resolve_creds(nr)['ELAPSED']
+            for key in env_vars:
+                os.environ.pop(key, None)
+
+            # Same credentials in the vault, keyed like env_creds.index_env_creds
+            vault_path = os.path.join(directory, f"{size}.vault")
+            cred_vault.write_vault(vault_path, env_creds.index_env_creds(env_vars), "bench")
+            source = cred_vault.VaultSource(vault_path, passphrase="bench")
+            nr = init_nornir(hosts, groups)
+            summary = env_creds.resolve_creds(nr, source=source)
+
+            # Per object lookups, as set_creds does them, are now served from the cache
+            names = [name.upper() for name in hosts]
+            start = time.perf_counter()
+            for name in names:
+                source.lookup([name])
+            cached = (time.perf_counter() - start) / len(names)
+
+            print(f"{size:>10} {env_time:>10.4f} {summary['ELAPSED']:>10.4f} {source.decrypts:>9} "
+                  f"{cached * 1e6:>19.2f} {len(summary['MISSING']):>8}")
+
+
+def bench_schedule(num_hosts=400, num_slow=5, fast_latency=0.05, slow_latency=2.0, num_workers=10):
+    """
+    Makespan of napalm_get against the fake driver in inventory order versus slowest first.
+    The slow hosts are placed at the end of the inventory, like the NX-API boxes at the end of hosts.yaml.
+    """
+    hosts, groups, env_vars = build_inventory(num_hosts, num_groups=1, host_env_ratio=0)
+    slow_hosts = list(hosts)[-num_slow:]
+    latencies = {hosts[name]["hostname"]: (slow_latency / 2, slow_latency / 2) for name in slow_hosts}
+
+    print(f"\n======== napalm_get makespan, {num_hosts} hosts ({num_slow} slow at the end), "
+          f"{num_workers} workers ========")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        history_file = os.path.join(tmp_dir, "run_history.json")
+
+        nr = init_nornir(hosts, groups, defaults={"username": "bench", "password": "bench"},
+                         num_workers=num_workers)
+        fake_napalm.use_fake_napalm(latencies, default_latency=(fast_latency / 2, fast_latency / 2))
+
+        # First run in inventory order builds the history
+        history = host_scheduler.RunHistory(history_file)
+        timings = {}
+        start = time.perf_counter()
+        nr.run(host_scheduler.timed_napalm_get, getters=['get_facts'], timings=timings)
+        inventory_order = time.perf_counter() - start
+        history.record(timings, num_workers, inventory_order, configured=num_workers)
+        history.save()
+        nr.close_connections()
+        print(f"{'inventory order':>20}: {inventory_order:.2f} s with {num_workers} workers")
+
+        # Same worker count, only the dispatch order changes
+        ordered_nr = host_scheduler.order_by_history(nr, history)
+        start = time.perf_counter()
+        ordered_nr.run(host_scheduler.timed_napalm_get, getters=['get_facts'], timings={})
+        print(f"{'slowest first':>20}: {time.perf_counter() - start:.2f} s with {num_workers} workers")
+        nr.close_connections()
+
+        # Adaptive worker count on top of the ordering
+        for run in range(1, 4):
+            nr.data.reset_failed_hosts()
+            start = time.perf_counter()
+            host_scheduler.scheduled_run(nr, getters=['get_facts'], history_file=history_file, verbose=False)
+            elapsed = time.perf_counter() - start
+            nr.close_connections()
+            workers = host_scheduler.RunHistory(history_file).runs[-1]["num_workers"]
+            print(f"{'adaptive run ' + str(run):>20}: {elapsed:.2f} s with {workers} workers")
+
+
+def bench_preflight(num_hosts=400, num_groups=10, num_bad=2, latency=0.05, auth_timeout=2.0, num_workers=20):
+    """
+    get_facts with wrong passwords in num_bad groups, with and without the credential pre-flight.  The fake devices
+    only accept the credentials in the environment variables built by build_inventory and a rejected login takes
+    auth_timeout seconds, like a device waiting out the login timeout.
+    """
+    hosts, groups, env_vars = build_inventory(num_hosts, num_groups)
+    valid_creds = {(env_vars[key], env_vars[key[:-4] + "_PWD"]) for key in env_vars if key.endswith("_USR")}
+    # The last groups, build_inventory only gives hosts of the first group their own credentials
+    bad_groups = [f"bench_group_{g}" for g in range(num_groups - num_bad, num_groups)]
+    for name in bad_groups:
+        env_vars[f"{name.upper()}_PWD"] = "wrong_pwd"
+    bad_hosts = {host["hostname"] for host in hosts.values() if host["groups"][0] in bad_groups}
+    latencies = {hostname: (auth_timeout, 0.0) for hostname in bad_hosts}
+
+    print(f"\n======== Credential pre-flight, {num_hosts} hosts, wrong password in {num_bad} of {num_groups} groups "
+          f"({len(bad_hosts)} hosts), {num_workers} workers ========")
+    print(f"{'variant':>22} {'preflight (s)':>14} {'run (s)':>8} {'total (s)':>10} {'failed':>7} {'skipped':>8}")
+
+    os.environ.update(env_vars)
+    try:
+        for use_preflight in (False, True):
+            nr = init_nornir(hosts, groups, num_workers=num_workers)
+            fake_napalm.use_fake_napalm(latencies, default_latency=(latency / 2, latency / 2),
+                                        valid_creds=valid_creds)
+            env_creds.resolve_creds(nr)
+            env_creds.inherit_creds(nr)
+
+            start = time.perf_counter()
+            preflight_time, skipped = 0.0, set()
+            if use_preflight:
+                summary = cred_preflight.preflight(nr, workers=num_workers)
+                preflight_time = summary['ELAPSED']
+                skipped = cred_preflight.failed_hosts(summary)
+                nr = nr.filter(filter_func=lambda host: host.name not in skipped)
+            run_start = time.perf_counter()
+            result = nr.run(napalm_get, getters=['get_facts'])
+            end = time.perf_counter()
+            nr.close_connections()
+
+            print(f"{'with pre-flight' if use_preflight else 'without pre-flight':>22} {preflight_time:>14.2f} "
+                  f"{end - run_start:>8.2f} {end - start:>10.2f} {len(result.failed_hosts):>7} {len(skipped):>8}")
+    finally:
+        for key in env_vars:
+            os.environ.pop(key, None)
+
+
+def bench_select(sizes, num_groups=10, num_selected=50, num_workers=20):
+    """
+    Partial run of num_selected hosts in a "bench_target" group (platform nxos) as the inventory grows: one
+    nr.filter pass (filter_hosts, what env_creds.py does) against the InventoryIndex, whose build is paid once and
+    then every query is served from the index (the collector daemon), then credential resolution and get_facts on
+    the selection.  "build + query" is the cost of the index for a single selection.
+    """
+    print(f"\n======== Selecting {num_selected} hosts by group, nr.filter vs InventoryIndex (best of 3) ========")
+    print(f"{'hosts':>10} {'nr.filter (ms)':>15} {'index build (ms)':>17} {'query (ms)':>11} "
+          f"{'build + query (ms)':>19} {'break even':>11} {'resolve (ms)':>13} {'run (s)':>8}")
+
+    for size in sizes:
+        # No per host environment variables, so the environment does not grow with the inventory
+        hosts, groups, env_vars = build_inventory(size, num_groups, host_env_ratio=0)
+        groups["bench_target"] = {"platform": "nxos"}
+        for name in list(hosts)[:num_selected]:
+            hosts[name]["groups"].insert(0, "bench_target")
+
+        os.environ.update(env_vars)
+        nr = init_nornir(hosts, groups, num_workers=num_workers)
+        fake_napalm.use_fake_napalm()
+
+        filter_time = build_time = index_time = None
+        for _ in range(3):
+            start = time.perf_counter()
+            linear = inventory_index.filter_hosts(nr, groups=["bench_target"], platforms=["nxos"])
+            elapsed = time.perf_counter() - start
+            filter_time = elapsed if filter_time is None else min(filter_time, elapsed)
+
+            index = inventory_index.InventoryIndex(nr.inventory)
+            build_time = index.elapsed if build_time is None else min(build_time, index.elapsed)
+
+            start = time.perf_counter()
+            selected = index.filter(nr, groups=["bench_target"], platforms=["nxos"])
+            elapsed = time.perf_counter() - start
+            index_time = elapsed if index_time is None else min(index_time, elapsed)
+        assert list(selected.inventory.hosts) == list(linear.inventory.hosts)
+        # Selections after which the index build has paid for itself
+        break_even = math.ceil(build_time / (filter_time - index_time)) if filter_time > index_time else None
+
+        resolve_time = env_creds.resolve_creds(selected)['ELAPSED']
+        start = time.perf_counter()
+        result = selected.run(napalm_get, getters=['get_facts'])
+        run_time = time.perf_counter() - start
+        assert len(result) == num_selected and not result.failed_hosts
+        for key in env_vars:
+            os.environ.pop(key, None)
+
+        print(f"{size:>10} {filter_time * 1000:>15.2f} {build_time * 1000:>17.2f} {index_time * 1000:>11.3f} "
+              f"{(build_time + index_time) * 1000:>19.2f} {break_even or '-':>11} {resolve_time * 1000:>13.3f} "
+              f"{run_time:>8.3f}")
+
+
+def bench_result_sink(sizes, num_workers=50):
+    """
+    Memory retained by napalm_get results held in the AggregatedResult versus streamed to JSON Lines and dropped
+    """
+    print(f"\n======== napalm_get result memory by host count (fake driver) ========")
+    print(f"{'hosts':>10} {'in memory (KiB)':>16} {'streamed (KiB)':>16} {'per host kept (B)':>18} "
+          f"{'per host streamed (B)':>22}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            hosts, groups, env_vars = build_inventory(size, num_groups=1, host_env_ratio=0)
+            nr = init_nornir(hosts, groups, defaults={"username": "bench", "password": "bench"},
+                             num_workers=num_workers)
+            fake_napalm.use_fake_napalm()
+
+            peaks = []
+            for drop_results in (False, True):
+                tracemalloc.start()
+                if drop_results:
+                    with result_sink.JsonLinesSink(os.path.join(tmp_dir, "facts.jsonl"), drop_results=True) as sink:
+                        result = nr.with_processors([sink]).run(napalm_get, getters=['get_facts'])
+                else:
+                    result = nr.run(napalm_get, getters=['get_facts'])
+                nr.close_connections()
+                peaks.append(tracemalloc.get_traced_memory()[0])
+                tracemalloc.stop()
+                del result
+
+            print(f"{size:>10} {peaks[0] / 1024:>16.0f} {peaks[1] / 1024:>16.0f} {peaks[0] / size:>18.0f} "
+                  f"{peaks[1] / size:>22.0f}")
+
+
+def write_inventory_files(directory, hosts, groups, env_vars=None):
+    """
+    Write hosts.yaml and groups.yaml and, when env_vars is given, a bench.env file with the matching
+    <NAME>_USR/<NAME>_PWD variables (.env format, load it with python-dotenv or `set -a; . ./bench.env`)
+    """
+    host_file = os.path.join(directory, "hosts.yaml")
+    group_file = os.path.join(directory, "groups.yaml")
+    with open(host_file, "w") as f:
+        yaml.safe_dump(hosts, f)
+    with open(group_file, "w") as f:
+        yaml.safe_dump(groups, f)
+    if env_vars:
+        with open(os.path.join(directory, "bench.env"), "w") as f:
+            f.writelines(f"{key}={value}\n" for key, value in env_vars.items())
+    return host_file, group_file
+
+
+def percentile(values, fraction):
+    # Nearest rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def bench_end_to_end(sizes, num_groups=10, latency=0.02, jitter=0.5, failure_rate=0.01, num_workers=100):
+    """
+    env_creds resolution and collection path against the fake NAPALM driver: bulk credential resolution,
+    inheritance, then timed napalm get_facts over every host.
+    """
+    print(f"\n======== End to end: {num_groups} groups, {latency * 1000:.0f} ms +/-{jitter * 100:.0f}% latency, "
+          f"{failure_rate * 100:.1f}% failures, {num_workers} workers ========")
+    print(f"{'hosts':>10} {'creds (s)':>10} {'collect (s)':>12} {'hosts/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'failed':>7} {'peak MiB':>9}")
+
+    for size in sizes:
+        hosts, groups, env_vars = build_inventory(size, num_groups)
+        os.environ.update(env_vars)
+
+        tracemalloc.start()
+        nr = init_nornir(hosts, groups, num_workers=num_workers)
+        fake_napalm.use_fake_napalm(default_latency=(latency / 2, latency / 2), failure_rate=failure_rate,
+                                    jitter=jitter)
+
+        start = time.perf_counter()
+        env_creds.resolve_creds(nr)
+        env_creds.inherit_creds(nr)
+        creds = time.perf_counter() - start
+
+        timings = {}
+        start = time.perf_counter()
+        nr.run(host_scheduler.timed_napalm_get, getters=['get_facts'], timings=timings)
+        collect = time.perf_counter() - start
+        nr.close_connections(on_failed=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies = sorted(t["connect"] + t["getter"] for t in timings.values() if not t["failed"])
+        failed = sum(1 for t in timings.values() if t["failed"])
+        print(f"{size:>10} {creds:>10.3f} {collect:>12.2f} {size / collect:>9.0f} "
+              f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} "
+              f"{failed:>7} {peak / 1024 / 1024:>9.1f}")
+
+        for key in env_vars:
+            os.environ.pop(key, None)
+
+
+def bench_inventory_cache(sizes, num_groups=10):
+    """
+    InitNornir startup time parsing the YAML inventory files versus loading the compiled inventory snapshot
+    """
+    print(f"\n======== InitNornir startup time by host count ========")
+    print(f"{'hosts':>10} {'yaml (s)':>10} {'build cache (s)':>16} {'cached (s)':>12} {'speedup':>10}")
+
+    for size in sizes:
+        hosts, groups, env_vars = build_inventory(size, num_groups)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            host_file, group_file = write_inventory_files(tmp_dir, hosts, groups)
+            options = {"host_file": host_file, "group_file": group_file, "defaults_file": ""}
+            timings = []
+            for plugin in ("nornir.plugins.inventory.simple.SimpleInventory", "inventory_cache.CachedInventory",
+                           "inventory_cache.CachedInventory"):
+                if plugin.startswith("inventory_cache"):
+                    options["cache_file"] = os.path.join(tmp_dir, "inventory.pickle")
+                fake_napalm.restore_napalm()
+                start = time.perf_counter()
+                InitNornir(inventory={"plugin": plugin, "options": options}, logging={"enabled": False})
+                timings.append(time.perf_counter() - start)
+            assert inventory_cache.CachedInventory.last_load == "cache"
+
+        print(f"{size:>10} {timings[0]:>10.3f} {timings[1]:>16.3f} {timings[2]:>12.3f} "
+              f"{timings[0] / timings[2]:>9.1f}x")
+
+
+SHOW_IP_INT_BRIEF_TEMPLATE = r"""Value INTF (\S+)
+Value IPADDR (\S+)
+Value STATUS (up|down|administratively down)
+Value PROTO (up|down)
+
+Start
+  ^${INTF}\s+${IPADDR}\s+\w+\s+\w+\s+${STATUS}\s+${PROTO}\s*$$ -> Record
+"""
+
+
+def synthetic_show_ip_int_brief(num_interfaces):
+    lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+    for i in range(num_interfaces):
+        lines.append(f"GigabitEthernet1/0/{i:<4}   10.{i // 256 % 256}.{i % 256}.1      YES NVRAM  up"
+                     f"                    up")
+    return "\n".join(lines)
+
+
+def bench_parse_pool(num_hosts=500, num_interfaces=200):
+    """
+    TextFSM parsing of synthetic show ip interface brief output inline versus in the process pool stage
+    """
+    command = "show ip interface brief"
+    output = synthetic_show_ip_int_brief(num_interfaces)
+    cpus = os.cpu_count() or 1
+
+    print(f"\n======== TextFSM parsing, {num_hosts} hosts x {num_interfaces} interfaces ({cpus} CPUs) ========")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template = os.path.join(tmp_dir, "show_ip_int_brief.textfsm")
+        with open(template, "w") as f:
+            f.write(SHOW_IP_INT_BRIEF_TEMPLATE)
+
+        start = time.perf_counter()
+        for h in range(num_hosts):
+            parse_pool.parse_output(f"bench_host_{h}", command, template, output)
+        inline = time.perf_counter() - start
+        print(f"{'inline':>12}: {inline:.2f} s")
+
+        for workers in sorted({1, 2, 4, cpus}):
+            with parse_pool.ParsePipeline({command: template}, max_workers=workers) as pipeline:
+                # Process startup happens before the run in env_creds too
+                pipeline.start()
+                start = time.perf_counter()
+                for h in range(num_hosts):
+                    pipeline.submit(f"bench_host_{h}", command, output)
+                rows = sum(len(parsed) for host, cmd, parsed in pipeline.records())
+                elapsed = time.perf_counter() - start
+            print(f"{str(workers) + ' procs':>12}: {elapsed:.2f} s ({inline / elapsed:.1f}x, {rows} records)")
+
+
+def bench_fact_store(sizes, num_workers=50):
+    """
+    Memory of get_facts kept in the nornir Result objects versus the compact column store, and the time of a
+    "count by os_version" query on each
+    """
+    print(f"\n======== get_facts memory by host count: Result objects vs column store ========")
+    print(f"{'hosts':>10} {'results (KiB)':>14} {'store (KiB)':>12} {'ratio':>7} {'count results (ms)':>19} "
+          f"{'count store (ms)':>17}")
+
+    for size in sizes:
+        hosts, groups, env_vars = build_inventory(size, num_groups=1, host_env_ratio=0)
+        nr = init_nornir(hosts, groups, defaults={"username": "bench", "password": "bench"},
+                         num_workers=num_workers)
+        fake_napalm.use_fake_napalm()
+
+        tracemalloc.start()
+        result = nr.run(napalm_get, getters=['get_facts'])
+        nr.close_connections()
+        results_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        store = fact_store.FactStore()
+        for name, multi_result in result.items():
+            store.add(name, multi_result.result["get_facts"])
+        store_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        counts = {}
+        for multi_result in result.values():
+            os_version = multi_result.result["get_facts"]["os_version"]
+            counts[os_version] = counts.get(os_version, 0) + 1
+        count_results = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.count_by("os_version")
+        count_store = time.perf_counter() - start
+
+        print(f"{size:>10} {results_memory / 1024:>14.0f} {store_memory / 1024:>12.0f} "
+              f"{results_memory / store_memory:>6.1f}x {count_results * 1000:>19.2f} {count_store * 1000:>17.2f}")
+
+
+def main():
+
+    if arguments.write_inventory:
+        # Only generate the synthetic inventories and their environment variables
+        for size in arguments.sizes:
+            directory = os.path.join(arguments.write_inventory, str(size))
+            os.makedirs(directory, exist_ok=True)
+            hosts, groups, env_vars = build_inventory(size, arguments.groups)
+            write_inventory_files(directory, hosts, groups, env_vars)
+            print(f"Synthetic inventory with {size} hosts and {arguments.groups} groups written to {directory}")
+        return
+
+    if arguments.end_to_end:
+        bench_end_to_end(arguments.sizes, num_groups=arguments.groups, latency=arguments.latency,
+                         failure_rate=arguments.failure_rate, num_workers=arguments.workers)
+        return
+
+    bench_resolve_creds(arguments.sizes, num_groups=arguments.groups)
+    bench_inherit_creds(arguments.sizes, num_groups=arguments.groups)
+    if arguments.vault:
+        bench_vault(arguments.sizes, num_groups=arguments.groups)
+    if arguments.schedule:
+        bench_schedule()
+    if arguments.preflight:
+        bench_preflight(num_groups=arguments.groups)
+    if arguments.select:
+        bench_select(arguments.sizes, num_groups=arguments.groups)
+    if arguments.result_sink:
+        bench_result_sink(arguments.sizes)
+    if arguments.inventory_cache:
+        bench_inventory_cache(arguments.sizes, num_groups=arguments.groups)
+    if arguments.parse_pool:
+        bench_parse_pool()
+    if arguments.fact_store:
+        bench_fact_store(arguments.sizes)
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for the env_creds script",
+                                     epilog="Usage: ' python bench_env_creds.py -n 100 1000 10000' or "
+                                            "' python bench_env_creds.py -e -n 100 1000 10000 100000' ")
+    parser.add_argument('-n', '--sizes', nargs='+', type=int, default=[100, 1000, 10000, 40000],
+                        help='Host counts to benchmark')
+    parser.add_argument('-g', '--groups', type=int, default=10, help='Number of groups in the synthetic inventory')
+    parser.add_argument('-v', '--vault', action='store_true', default=False,
+                        help='Also benchmark bulk credential resolution from the encrypted credential vault')
+    parser.add_argument('-s', '--schedule', action='store_true', default=False,
+                        help='Also benchmark the latency aware host scheduler with the fake NAPALM driver')
+    parser.add_argument('-a', '--preflight', action='store_true', default=False,
+                        help='Also benchmark the credential pre-flight check with wrong passwords in some groups')
+    parser.add_argument('-S', '--select', action='store_true', default=False,
+                        help='Also benchmark selecting a fixed number of hosts with nr.filter and the inventory index')
+    parser.add_argument('-r', '--result_sink', action='store_true', default=False,
+                        help='Also benchmark result memory with and without the JSON Lines result sink')
+    parser.add_argument('-i', '--inventory_cache', action='store_true', default=False,
+                        help='Also benchmark InitNornir startup with and without the compiled inventory cache')
+    parser.add_argument('-p', '--parse_pool', action='store_true', default=False,
+                        help='Also benchmark TextFSM parsing of synthetic CLI output in the process pool stage')
+    parser.add_argument('-f', '--fact_store', action='store_true', default=False,
+                        help='Also benchmark get_facts memory in Result objects versus the column store')
+    parser.add_argument('-e', '--end_to_end', action='store_true', default=False,
+                        help='Run only the end to end suite: credential resolution and get_facts collection against '
+                             'the fake NAPALM driver with throughput, p50/p99 latency and peak memory')
+    parser.add_argument('--latency', type=float, default=0.02, help='End to end: fake device latency in seconds')
+    parser.add_argument('--failure_rate', type=float, default=0.01,
+                        help='End to end: fraction of fake connections which fail')
+    parser.add_argument('--workers', type=int, default=100, help='End to end: number of Nornir workers')
+    parser.add_argument('-w', '--write_inventory', default='',
+                        help='Only write the synthetic hosts.yaml, groups.yaml and bench.env for each size to '
+                             '<DIR>/<size>/')
+    arguments = parser.parse_args()
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: bench_import_time
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Scripts which are started over and over again by automation
+MODULES = ["env_creds", "env_apikeys", "add_2env", "env_creds_daemon"]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of python -X importtime.
+
+    Each line looks like "import time:  self [us] | cumulative | imported package" with nested imports indented
+    under the module which imported them.
+
+    :return: list of (module name, nesting level, self microseconds, cumulative microseconds) in output order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One space after the separator at the top level, two more per nesting level
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), level, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def import_time(module, repeat=5):
+    """
+    Import the module in a fresh interpreter repeat times.
+
+    :return: (best cumulative import time of the module in microseconds, importtime entries of that run)
+    """
+    best = None
+    best_entries = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SCRIPT_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+        entries = parse_importtime(proc.stderr)
+        # The module itself is the last entry at the top level, everything it imported is listed before it
+        total = [cumulative for name, level, self_us, cumulative in entries if name == module and level == 0][-1]
+        if best is None or total < best:
+            best, best_entries = total, entries
+    return best, best_entries
+
+
+def help_time(module, repeat=5):
+    # Wall clock time of "python <module>.py -h", interpreter startup and argument parsing included
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, f"{module}.py", "-h"], cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def heaviest(entries, module, top=5):
+    # Largest direct imports of the module, the ones worth making lazy.  They are the level 1 entries listed
+    # between the previous top level entry and the module itself.
+    start = end = 0
+    for index, (name, level, self_us, cumulative) in enumerate(entries):
+        if level == 0 and name == module:
+            end = index
+        elif level == 0:
+            start = index + 1
+    direct = [(name, cumulative) for name, level, self_us, cumulative in entries[start:end] if level == 1]
+    return sorted(direct, key=lambda item: -item[1])[:top]
+
+
+def main():
+
+    print(f"\n============= Import Time (best of {arguments.repeat}, budget {arguments.budget} ms) =============")
+    print(f"{'module':>20} {'import ms':>10} {'-h ms':>10}  status")
+
+    over_budget = []
+    for module in arguments.modules:
+        total, entries = import_time(module, repeat=arguments.repeat)
+        startup = help_time(module, repeat=arguments.repeat)
+        status = "OK" if total / 1000 <= arguments.budget else "OVER BUDGET"
+        if status != "OK":
+            over_budget.append(module)
+        print(f"{module:>20} {total / 1000:>10.1f} {startup * 1000:>10.1f}  {status}")
+
+        if arguments.verbose or status != "OK":
+            for name, cumulative in heaviest(entries, module):
+                print(f"{'':>20}   {cumulative / 1000:>8.1f} ms  {name}")
+
+    if over_budget:
+        print(f"\nERROR! {', '.join(over_budget)} took longer than {arguments.budget} ms to import")
+        sys.exit(1)
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import time benchmark for the creds_in_env scripts using "
+                                                 "python -X importtime",
+                                     epilog="Usage: ' python bench_import_time.py -b 100' ")
+    parser.add_argument('-m', '--modules', nargs='+', default=MODULES, help='Modules to import')
+    parser.add_argument('-b', '--budget', type=float, default=100.0,
+                        help='Import time budget per module in milliseconds, the script exits with status 1 when '
+                             'a module takes longer')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of fresh interpreters per module, the best time is reported')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False,
+                        help='Show the heaviest direct imports of every module, not only those over budget')
+    arguments = parser.parse_args()
+    main()
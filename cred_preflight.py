@@ -0,0 +1,176 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: cred_preflight
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import concurrent.futures
+import getpass
+import re
+import time
+
+# Exception classes of authentication failures, matched by name anywhere in the class hierarchy so the driver
+# libraries do not have to be imported: paramiko AuthenticationException (and netmiko
+# NetMikoAuthenticationException which subclasses it), napalm ConnectAuthError and the fake_napalm test driver
+AUTH_ERROR_TYPES = ("AuthenticationException", "NetMikoAuthenticationException", "ConnectAuthError",
+                    "FakeAuthenticationError")
+
+# Authentication failures reported in the message of a generic exception, such as the HTTP 401/403 of NX-API and
+# RESTCONF.  Status codes only match as whole words so a port, a line number or an address containing 401 does not
+AUTH_ERROR_MESSAGE = re.compile(r"\b(401|403)\b|\bunauthori[sz]ed\b|\bforbidden\b|\bauthentication failed\b|"
+                                r"\bauth failed\b|\bpermission denied\b", re.IGNORECASE)
+
+
+def cred_scopes(nr):
+    """
+    Group the hosts by unique credential scope: the effective username/password pair and the first group (or the
+    defaults) the hosts belong to, which is what prompt_missing_creds names when asking for credentials.
+
+    :param nr: Nornir object
+    :return: dictionary keyed by (context, name, username, password) with the list of host names as value
+    """
+    scopes = {}
+    for name, host in nr.inventory.hosts.items():
+        if host.groups.refs:
+            scope = ("group", host.groups.refs[0].name)
+        else:
+            scope = ("default", "defaults")
+        scopes.setdefault(scope + (host.username, host.password), []).append(name)
+    return scopes
+
+
+def is_auth_error(exc):
+    # Authentication failures fail every host of the scope, any other error only says the host was not reachable.
+    # Drivers often wrap the library exception, so the exceptions it was raised from are checked as well.
+    while exc is not None:
+        if any(cls.__name__ in AUTH_ERROR_TYPES for cls in type(exc).__mro__):
+            return True
+        if AUTH_ERROR_MESSAGE.search(str(exc)):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def napalm_probe(host, configuration):
+    """
+    Default probe, open the napalm connection of the host.  A successful connection is kept open in the host's
+    connection pool so the napalm getters of the main run reuse it instead of logging in again.
+    """
+    try:
+        host.get_connection("napalm", configuration)
+    except Exception:
+        # Nornir registers the connection before opening it, drop the broken one so the main run starts over
+        host.connections.pop("napalm", None)
+        raise
+
+
+def _probe_scope(nr, host_names, probe, attempts):
+    # Try up to attempts hosts of the scope until one answers, an authentication failure ends the scope at once
+    status, error, probed = "UNREACHABLE", "", []
+    for name in host_names[:attempts]:
+        probed.append(name)
+        try:
+            probe(nr.inventory.hosts[name], nr.config)
+            return "OK", "", probed
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if is_auth_error(e):
+                return "AUTH_FAILED", error, probed
+    return status, error, probed
+
+
+def preflight(nr, probe=napalm_probe, workers=20, attempts=2, scopes=None):
+    """
+    Authenticate one representative host per unique credential scope concurrently before the main run, so a wrong
+    group password costs one login attempt instead of a connect timeout on every host of the group.
+
+    A scope fails when its representative rejects the credentials.  When the representative cannot be reached,
+    the next host of the scope is tried, up to attempts hosts, and a scope with no reachable host is reported as
+    UNREACHABLE but not failed.
+
+    :param nr: Nornir object with the credentials resolved
+    :param probe: Callable (host, configuration) which raises when the host cannot be logged into
+    :param workers: Maximum number of concurrent probes
+    :param attempts: Hosts tried per scope before it is reported unreachable
+    :param scopes: Optional dictionary returned by cred_scopes, to only check some scopes
+    :return: summary dictionary
+    SCOPES: dictionary of scope to a dictionary with the HOSTS, STATUS (OK, AUTH_FAILED or UNREACHABLE), the ERROR
+    of the last probe and the PROBED host names
+    FAILED: list of the scopes whose credentials were rejected
+    ELAPSED: pre-flight time in seconds
+    """
+    start = time.perf_counter()
+    if scopes is None:
+        scopes = cred_scopes(nr)
+
+    summary = {'SCOPES': {}, 'FAILED': [], 'ELAPSED': 0.0}
+    if scopes:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(scopes))) as pool:
+            futures = {scope: pool.submit(_probe_scope, nr, host_names, probe, attempts)
+                       for scope, host_names in scopes.items()}
+            for scope, future in futures.items():
+                status, error, probed = future.result()
+                summary['SCOPES'][scope] = {'HOSTS': scopes[scope], 'STATUS': status, 'ERROR': error,
+                                            'PROBED': probed}
+                if status == "AUTH_FAILED":
+                    summary['FAILED'].append(scope)
+
+    summary['ELAPSED'] = time.perf_counter() - start
+    return summary
+
+
+def reprompt_failed(nr, summary, probe=napalm_probe, workers=20, attempts=2):
+    """
+    Prompt once per failed scope and set the new credentials directly on the hosts of that scope, then check those
+    scopes again.  Only the hosts of the scope are changed, other hosts inheriting from the same group or the
+    defaults with different credentials are not affected.
+
+    :param summary: dictionary returned by preflight, updated with the result of the second check
+    :return: the updated summary
+    """
+    retry = {}
+    for scope in summary['FAILED']:
+        context, name, username, password = scope
+        host_names = summary['SCOPES'][scope]['HOSTS']
+        print(f"\n============= Credentials rejected for {context} {name} ({len(host_names)} hosts) =============")
+        print(summary['SCOPES'][scope]['ERROR'])
+        username = input(f"\nPlease enter username for {context} {name} [{username}]: ") or username
+        password = getpass.getpass(f"Please enter password for {context} {name}: ")
+        for host_name in host_names:
+            host = nr.inventory.hosts[host_name]
+            host.username = username
+            host.password = password
+        retry[(context, name, username, password)] = host_names
+
+    second = preflight(nr, probe=probe, workers=workers, attempts=attempts, scopes=retry)
+    for scope in summary['FAILED']:
+        del summary['SCOPES'][scope]
+    summary['SCOPES'].update(second['SCOPES'])
+    summary['FAILED'] = second['FAILED']
+    summary['ELAPSED'] += second['ELAPSED']
+    return summary
+
+
+def failed_hosts(summary):
+    # Names of the hosts in the failed scopes, the ones to leave out of the main run
+    return {name for scope in summary['FAILED'] for name in summary['SCOPES'][scope]['HOSTS']}
+
+
+def print_report(summary):
+
+    print(f"\n============= Credential Pre-flight =============")
+    for (context, name, username, password), scope in summary['SCOPES'].items():
+        print(f"\t{context} {name} user {username}: {scope['STATUS']} ({len(scope['HOSTS'])} hosts, "
+              f"probed {', '.join(scope['PROBED'])})")
+        if scope['STATUS'] != "OK":
+            print(f"\t\t{scope['ERROR']}")
+    print(f"{len(summary['SCOPES'])} credential scopes checked in {summary['ELAPSED']:.2f} seconds, "
+          f"{len(failed_hosts(summary))} hosts with rejected credentials\n")
@@ -0,0 +1,230 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: cred_vault
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import base64
+import collections
+import getpass
+import json
+import os
+import threading
+import time
+
+# The vault passphrase is read from this environment variable, or prompted for when it is not set
+PASSPHRASE_ENV = "CRED_VAULT_PASSPHRASE"
+
+_FILE_MAGIC = b"CREDVLT1"
+_SALT_BYTES = 16
+_KDF_ITERATIONS = 390000
+
+
+class CredentialSource(object):
+    """
+    Interface of a credential backend for env_creds.resolve_creds and env_creds.set_creds.
+
+    Names are the same keys as env_creds.index_env_creds: the uppercase group or device name, and the lowercase
+    "default" for the Nornir defaults.
+    """
+
+    def lookup(self, names):
+        """
+        Batch lookup, backends should fetch all the names in one round trip.
+
+        :param names: iterable of credential names
+        :return: dictionary of name to [username, password] for the names the backend knows
+        """
+        raise NotImplementedError
+
+
+class MappingSource(CredentialSource):
+    """
+    Credentials already fetched, for example the result of one batch lookup, served without going back to the
+    backend.
+
+    :param creds: dictionary of name to [username, password]
+    """
+
+    def __init__(self, creds):
+        self.creds = creds
+
+    def lookup(self, names):
+        return {name: self.creds[name] for name in names if name in self.creds}
+
+
+class VaultSource(CredentialSource):
+    """
+    Credentials stored in a local file encrypted with a passphrase (Fernet, key derived with PBKDF2-HMAC-SHA256).
+
+    A lookup decrypts the whole vault once for all the names which are not cached, keeps only the requested
+    entries and drops the rest of the plain text.  Results, including names which are not in the vault, are kept in
+    a bounded least recently used cache for ttl seconds, so a long running process does not hold every
+    credential in memory and only reads the vault again when entries expire.
+
+    Usage:
+        source = VaultSource("creds.vault")
+        source.lookup(["default", "UWACO_NETWORK", "DEVNET_SANDBOX_IOSXE"])
+        env_creds.resolve_creds(nr, source=source)
+
+    :param path: Vault file
+    :param passphrase: Vault passphrase, defaults to the CRED_VAULT_PASSPHRASE environment variable or a prompt
+    :param ttl: Seconds a looked up entry stays in the cache
+    :param max_entries: Maximum number of cached entries.  A batch lookup of more names keeps all of its entries,
+    the cache is only trimmed back to max_entries by the entries of older lookups.
+    """
+
+    def __init__(self, path="creds.vault", passphrase=None, ttl=300, max_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.decrypts = 0
+        self.hits = 0
+        self.misses = 0
+        self._fernet = None
+        self._passphrase = passphrase
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_fernet(self, salt):
+        if self._fernet is None:
+            passphrase = self._passphrase or os.environ.get(PASSPHRASE_ENV) or getpass.getpass(
+                f"\nPlease enter the passphrase of credential vault {self.path} "
+                f"(or set `export {PASSPHRASE_ENV}=<passphrase>` to avoid this message): ")
+            self._fernet = fernet_from_passphrase(passphrase, salt)
+            # The derived key is kept, not the passphrase
+            self._passphrase = None
+        return self._fernet
+
+    def read(self):
+        """
+        Decrypt the whole vault.
+
+        :return: dictionary of name to [username, password]
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(_FILE_MAGIC):
+            raise ValueError(f"{self.path} is not a credential vault file")
+        salt = data[len(_FILE_MAGIC):len(_FILE_MAGIC) + _SALT_BYTES]
+        token = data[len(_FILE_MAGIC) + _SALT_BYTES:]
+        from cryptography.fernet import InvalidToken
+        self.decrypts += 1
+        try:
+            return json.loads(self._get_fernet(salt).decrypt(token))
+        except InvalidToken:
+            # Drop the key of the wrong passphrase so the next read asks again
+            self._fernet = None
+            raise ValueError(f"Cannot decrypt credential vault {self.path}: wrong passphrase") from None
+
+    def lookup(self, names):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            missing = []
+            for name in names:
+                entry = self._cache.get(name)
+                if entry is not None and entry[0] > now:
+                    self._cache.move_to_end(name)
+                    self.hits += 1
+                    if entry[1] is not None:
+                        found[name] = entry[1]
+                else:
+                    missing.append(name)
+
+            if missing:
+                self.misses += len(missing)
+                vault = self.read()
+                expires = now + self.ttl
+                for name in missing:
+                    creds = vault.get(name)
+                    self._cache[name] = (expires, creds)
+                    self._cache.move_to_end(name)
+                    if creds is not None:
+                        found[name] = creds
+                del vault
+                # Never evict the entries of this batch, they are about to be used one by one
+                while len(self._cache) > max(self.max_entries, len(missing)):
+                    self._cache.popitem(last=False)
+
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def fernet_from_passphrase(passphrase, salt):
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=_KDF_ITERATIONS)
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(passphrase.encode())))
+
+
+def write_vault(path, creds, passphrase):
+    """
+    Encrypt the credentials into a vault file with a new salt.  The file is replaced atomically and only readable by
+    its owner.
+
+    :param creds: dictionary of name to [username, password]
+    """
+    salt = os.urandom(_SALT_BYTES)
+    token = fernet_from_passphrase(passphrase, salt).encrypt(json.dumps(creds).encode())
+
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(_FILE_MAGIC + salt + token)
+    os.replace(tmp_path, path)
+
+
+def main():
+
+    passphrase = os.environ.get(PASSPHRASE_ENV) or getpass.getpass(f"\nPlease enter the vault passphrase: ")
+
+    creds = {}
+    if os.path.isfile(arguments.vault):
+        creds = VaultSource(arguments.vault, passphrase=passphrase).read()
+
+    if arguments.command == "list":
+        print(f"\n============= Credential Vault {arguments.vault} =============")
+        for name, (username, password) in sorted(creds.items()):
+            print(f"\t{name}: username {username}")
+        return
+
+    # Same naming as the environment variables: NETUSER/NETPASS are "default", groups and devices are uppercase
+    name = "default" if arguments.name.lower() == "default" else arguments.name.upper()
+    if arguments.command == "set":
+        username = input(f"\nPlease enter username for {name}: ")
+        password = getpass.getpass(f"Please enter password for {name}: ")
+        creds[name] = [username, password]
+    elif creds.pop(name, None) is None:
+        print(f"ERROR! {name} is not in the vault {arguments.vault}")
+        return
+
+    write_vault(arguments.vault, creds, passphrase)
+    print(f"\n============= {len(creds)} credentials saved to {arguments.vault} =============")
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage the encrypted local credential vault used by env_creds",
+                                     epilog="Usage: ' python cred_vault.py set uwaco_network' then "
+                                            "' python env_creds.py -b -V creds.vault' ")
+    parser.add_argument('command', choices=['set', 'remove', 'list'], help='Add or update, remove or list credentials')
+    parser.add_argument('name', nargs='?', default='default',
+                        help='Group or device name, or "default" for the Nornir defaults')
+    parser.add_argument('-V', '--vault', default='creds.vault', help='Vault file')
+    arguments = parser.parse_args()
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: dotenv_loader
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import codecs
+import os
+import re
+
+import add_2env
+
+
+# One match per KEY=VALUE binding, run over the whole file at once.  Same syntax as python-dotenv: optional export,
+# quoted or unquoted key, single quoted, double quoted (may span lines) or unquoted values with an optional
+# trailing comment.
+_BINDING = re.compile(r"""
+    ^[^\S\r\n]*(?:export[^\S\r\n]+)?
+    (?:'([^']+)'|([^=\#\s]+))[^\S\r\n]*=[^\S\r\n]*
+    (?:'((?:\\.|[^'\\])*)'
+      |"((?:\\.|[^"\\])*)"
+      |([^\r\n]*))
+""", re.MULTILINE | re.VERBOSE)
+_COMMENT = re.compile(r"\s+#.*")
+_DOUBLE_QUOTE_ESCAPES = re.compile(r"\\[\\'\"abfnrtv]")
+_SINGLE_QUOTE_ESCAPES = re.compile(r"\\[\\']")
+_VARIABLE = re.compile(r"\$\{([^}:]+)(?::-([^}]*))?\}")
+
+
+def _decode_escapes(regex, value):
+    return regex.sub(lambda match: codecs.decode(match.group(0), "unicode-escape"), value)
+
+
+def parse_dotenv(text, override=False, environ=None):
+    """
+    :param text: Content of a .env file
+    :param override: Variables already in the environment take precedence in ${VAR} expansion unless True
+    :param environ: Optional mapping to expand ${VAR} from instead of os.environ
+
+    Parse all the bindings of a .env file with one regular expression pass over the text instead of line by line.
+
+    :return: dictionary of variable name to value
+    """
+    if environ is None:
+        environ = os.environ
+
+    values = {}
+    for match in _BINDING.finditer(text):
+        quoted_key, key, single, double, unquoted = match.groups()
+        key = quoted_key or key
+        if single is not None:
+            value = _decode_escapes(_SINGLE_QUOTE_ESCAPES, single) if "\\" in single else single
+        elif double is not None:
+            value = _decode_escapes(_DOUBLE_QUOTE_ESCAPES, double) if "\\" in double else double
+        else:
+            value = _COMMENT.sub("", unquoted) if "#" in unquoted else unquoted
+            value = value.rstrip()
+        if "${" in value:
+            # Expand ${VAR} and ${VAR:-default} from the variables above and the environment
+            first, second = (values, environ) if override else (environ, values)
+            value = _VARIABLE.sub(lambda var: first.get(var.group(1), second.get(var.group(1))) or var.group(2) or "",
+                                  value)
+        values[key] = value
+
+    return values
+
+
+class DotenvLoader(object):
+    """
+    Incremental .env file loader for long running scripts which reload their configuration often.
+
+    load() compares the size, modification time and inode of the file with the last load and does nothing when they
+    have not changed.  When the file changed it is read in one buffered read, parsed in one pass and only the
+    variables which were added, changed or removed since the last load are applied to os.environ.
+
+    As with dotenv.load_dotenv, variables already set in the environment are not overridden unless override is
+    True, and only variables set by the loader are removed when they disappear from the file.
+
+    Usage:
+        loader = DotenvLoader('.env')
+        loader.load()     # EnvDiff of the variables applied
+        loader.load()     # None, the file has not changed
+
+    :param path: .env file to load
+    :param override: Override variables already set in the environment
+    """
+
+    def __init__(self, path, override=False):
+        self.path = path
+        self.override = override
+        self.values = {}
+        self._owned = set()
+        self._signature = None
+
+    def load(self):
+        """
+        :return: None when the file has not changed since the last load, otherwise an add_2env.EnvDiff with the
+        variable names added, removed and changed in the file
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        if signature == self._signature:
+            return None
+
+        # Variables the loader set on an earlier load are expanded from the file's new values, only the rest of the
+        # environment takes precedence over the file
+        environ = {key: value for key, value in os.environ.items() if key not in self._owned}
+        with open(self.path, "rb") as f:
+            values = parse_dotenv(f.read().decode("utf-8"), override=self.override, environ=environ)
+
+        previous = self.values
+        added = values.keys() - previous.keys()
+        removed = previous.keys() - values.keys()
+        changed = {key for key in values.keys() & previous.keys() if values[key] != previous[key]}
+
+        for key in added | changed:
+            if key in self._owned or self.override or key not in os.environ:
+                os.environ[key] = values[key]
+                self._owned.add(key)
+        for key in removed:
+            if key in self._owned:
+                os.environ.pop(key, None)
+                self._owned.discard(key)
+
+        self.values = values
+        self._signature = signature
+        return add_2env.EnvDiff(sorted(added), sorted(removed), sorted(changed))
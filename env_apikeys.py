@@ -13,20 +13,61 @@ __copyright__ = "Copyright (c) 2018 Claudia"
 __license__ = "Python"
 
 import argparse
+import concurrent.futures
 import json
 
+# Import the add_2env scritp as a module so that we can interactively define the API key in an environment variable
+import add_2env
+
 # For this script to run sucessfully, the request module needs to be installed
 # https://www.geeksforgeeks.org/how-to-install-requests-in-python-for-windows-linux-mac/
-import requests
+# requests and python-dotenv are imported by the functions which use them so the argument parsing (and -h) does not
+# wait for them to load
 
-# Import the add_2env scritp as a module so that we can interactively define the API key in an environment variable
-import add_2env
+# open-notify API endpoints, see iss_info
+ISS_API = "http://api.open-notify.org"
+ISS_ENDPOINTS = {
+    "astros": "/astros.json",
+    "pass": "/iss-pass.json?lat=45.0&lon=-122.3&alt=20&n=5",
+    "position": "/iss-now.json",
+}
+
+# Shared HTTP session, see get_session
+_session = None
+
+
+def get_session():
+    """
+    Return the requests Session shared by the API calls in this script.  Its connection pool keeps the TCP
+    connections to each API open between calls instead of opening a new one per request.
+    """
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
+
+
+def fetch_iss_data(endpoints=("astros", "pass", "position"), base_url=ISS_API, timeout=10):
+    """
+    Fetch the requested open-notify endpoints concurrently over the shared session.
 
-# Import the python-dotenv module
-import dotenv
+    :param endpoints: Names of the ISS_ENDPOINTS to fetch, only request the ones you need
+    :param base_url: API base URL (a local stand-in server when testing)
+    :param timeout: Timeout of each request in seconds
+    :return: dictionary of endpoint name to response
+    """
+    session = get_session()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(endpoints) or 1) as pool:
+        futures = {name: pool.submit(session.get, base_url + ISS_ENDPOINTS[name], timeout=timeout)
+                   for name in endpoints}
+        return {name: future.result() for name, future in futures.items()}
 
 
-def iss_info(debug=False):
+def iss_info(debug=False, endpoints=("astros", "pass", "position"), base_url=ISS_API):
     """
     This function uses the http://open-notify.org/Open-Notify-API/ API to obtain information about the International
     Space Station
@@ -40,38 +81,31 @@ def iss_info(debug=False):
     Number of people in space
     http://api.open-notify.org/astros.json?callback=?
 
-    :return:
-    """
-
-    response = requests.get("http://api.open-notify.org/astros.json")
-    # Print the status code of the response.
-    if debug:
-        print(response.status_code)
-        print(dir(response))
-        print(json.dumps(response.json(), indent=4))
-
+    The endpoints are fetched concurrently over one pooled session (see fetch_iss_data).
 
-    # The response is a list of the timestamp or each pass along with the duration in seconds.
-    response = requests.get("http://api.open-notify.org/iss-pass.json?lat=45.0&lon=-122.3&alt=20&n=5")
-    # Print the status code of the response.
-    if debug:
-        print(response.status_code)
-        print(dir(response))
-        print(json.dumps(response.json(), indent=4))
+    :param endpoints: Endpoints to fetch, any of "astros", "pass" and "position"
+    :param base_url: API base URL
+    :return: dictionary of endpoint name to response, for example iss_info()["position"].json()
+    """
+    responses = fetch_iss_data(endpoints, base_url=base_url)
 
-    response = requests.get("http://api.open-notify.org/iss-now.json")
-    # Print the status code of the response.
-    if debug:
-        print(response.status_code)
+    for name, response in responses.items():
+        # Print the status code of the response.
+        if debug:
+            print(response.status_code)
+            if name != "position":
+                print(dir(response))
+                print(json.dumps(response.json(), indent=4))
 
-    return response
+    return responses
 
 
-def get_iss_location():
+def get_iss_location(base_url=ISS_API):
 
-    iss_data = iss_info(debug=False)
+    # Only the position is needed here
+    iss_data = iss_info(debug=False, endpoints=("position",), base_url=base_url)
 
-    iss_data_dict = iss_data.json()
+    iss_data_dict = iss_data["position"].json()
 
     latitude = iss_data_dict['iss_position']['latitude']
     longitude = iss_data_dict['iss_position']['longitude']
@@ -79,7 +113,56 @@ def get_iss_location():
     return latitude, longitude
 
 
-def check_iss_location(key_valid, lat, lng, api_key):
+# HERE reverse geocode API, see check_iss_location
+HERE_REVGEOCODE = "https://revgeocode.search.hereapi.com/v1/revgeocode"
+
+
+def reverse_geocode(lat, lng, api_key, cache=None, base_url=HERE_REVGEOCODE, timeout=10):
+    """
+    Reverse geocode a point with the HERE API over the shared session.
+
+    With a geo_cache.GeocodeCache, a point in a cell already looked up is answered from the cache without calling the
+    API.  Only successful responses are cached, trimmed to the first item (an empty list of items is the ocean).
+
+    :param cache: optional geo_cache.GeocodeCache
+    :param base_url: API URL (a local stand-in server when testing)
+    :return: tuple of response status code, response json and whether it came from the cache.  For 429 and 5xx
+    responses and error responses which are not JSON, the json is {"error": <reason or body>}
+    :raises ValueError: when a 200 response is not valid JSON
+    """
+    if cache is not None:
+        resp_json = cache.get(lat, lng)
+        if resp_json is not None:
+            return 200, resp_json, True
+
+    # Actual URL used for the REST Call
+    # https://developer.here.com/documentation/geocoding-search-api/dev_guide/topics/endpoint-reverse-geocode-brief.html
+    # API Reference
+    # https://developer.here.com/documentation/geocoding-search-api/api-reference-swagger.html
+    # Format: {latitude},{longitude}
+    # Type: {decimal},{decimal}
+    # Example: -13.163068,-72.545128 (Machu Picchu Mountain, Peru)
+    params = {"at": f"{lat},{lng}", "lang": "en-US", "limit": 20, "apiKey": api_key}
+    response = get_session().get(base_url, params=params, timeout=timeout)
+
+    if response.status_code == 429 or response.status_code >= 500:
+        # Throttled or server error, the body is often an HTML page from a proxy and the call can be retried
+        return response.status_code, {"error": f"{response.status_code} {response.reason}"}, False
+
+    try:
+        resp_json = json.loads(response.text.encode('utf8'))
+    except ValueError:
+        if response.status_code == 200:
+            raise
+        resp_json = {"error": response.text[:200]}
+
+    if response.status_code == 200 and cache is not None:
+        cache.put(lat, lng, {"items": resp_json.get("items", [])[:1]})
+
+    return response.status_code, resp_json, False
+
+
+def check_iss_location(key_valid, lat, lng, api_key, cache=None, base_url=HERE_REVGEOCODE):
 
     ## BUILD the REST API URL
 
@@ -93,7 +176,6 @@ def check_iss_location(key_valid, lat, lng, api_key):
     # limit=20
     # &
     # apiKey=QEAoB66NeqP4_lZmkRJtMc6aY9bHMq7-p7Y-u8OzY04"
-    base_url = "https://revgeocode.search.hereapi.com/v1/revgeocode"
     lang = "en-US"
     limit = 20
 
@@ -103,31 +185,18 @@ def check_iss_location(key_valid, lat, lng, api_key):
         print(f"ERROR!  Invalid API Key.  Aborting script run...")
         exit()
 
-    # Actual URL used for the REST Call
-    # https://developer.here.com/documentation/geocoding-search-api/dev_guide/topics/endpoint-reverse-geocode-brief.html
-    # API Reference
-    # https://developer.here.com/documentation/geocoding-search-api/api-reference-swagger.html
-    # Format: {latitude},{longitude}
-    # Type: {decimal},{decimal}
-    # Example: -13.163068,-72.545128 (Machu Picchu Mountain, Peru)
-
-    url = f"{base_url}?at={lat},{lng}&lang={lang}&limit={limit}&apiKey={api_key}"
+    status_code, resp_json, cached = reverse_geocode(lat, lng, api_key, cache=cache, base_url=base_url)
 
-    payload = {}
-    headers = {}
-
-    response = requests.request("GET", url, headers=headers, data=payload)
-
-    resp_json = json.loads(response.text.encode('utf8'))
-
-    if response.status_code == 200:
+    if status_code == 200:
+        if cached:
+            print(f"Answered from the reverse geocode cache, no API call")
         print(json.dumps(resp_json, indent=4))
         if resp_json['items']:
             print(f"\n====== ISS is over {resp_json['items'][0]['address']['countryName']} ({resp_json['items'][0]['address']['label']}).\n")
         else:
             print(f"\n====== ISS is over water.\n")
     else:
-        print(f"ERROR! Call returned Response Code: {response.status_code}")
+        print(f"ERROR! Call returned Response Code: {status_code}")
         print(json.dumps(resp_json, indent = 4))
 
 
@@ -143,6 +212,8 @@ def main():
     # This method requires the python-dotenv module
     # This section is executed when the script is run with the -f option
     if arguments.file_env:
+        # Import the python-dotenv module
+        import dotenv
 
         # This loads the variables found in the local .env file into memory
         dotenv.load_dotenv()
@@ -162,7 +233,31 @@ def main():
 
     # The call to the function translating lat/long to a location is the same once the required parameters are set
     # either by interactively adding the key or obtaining it from a .env file
-    check_iss_location(api_key_valid, lat, lng, api_key_value)
+    cache = None
+    if arguments.geo_cache:
+        import geo_cache
+        cache = geo_cache.GeocodeCache(arguments.geo_cache, precision=arguments.precision,
+                                       max_entries=arguments.max_entries)
+
+    if arguments.track:
+        # Annotate a ground track instead of the single position
+        import iss_track
+        if not api_key_valid:
+            print(f"ERROR!  Invalid API Key.  Aborting script run...")
+            exit()
+        if arguments.positions_file:
+            positions = iss_track.read_positions(arguments.positions_file)
+        else:
+            positions = iss_track.poll_positions(arguments.track, interval=arguments.interval)
+        stats = iss_track.geocode_track(positions, api_key_value, arguments.output, rate=arguments.quota,
+                                        workers=arguments.workers, precision=arguments.precision, cache=cache)
+        iss_track.print_stats(stats, arguments.output)
+    else:
+        check_iss_location(api_key_valid, lat, lng, api_key_value, cache=cache)
+
+    if cache is not None:
+        cache.save()
+        geo_cache.print_stats(cache.stats())
 
 
 # Standard call to the main() function.
@@ -171,5 +266,23 @@ if __name__ == '__main__':
                                      epilog="Usage: ' python env_apikeys' ")
     parser.add_argument("-f", "--file_env", help="Use .env file to load environment variable(s)",
                         action="store_true", default=False)
+    parser.add_argument("-g", "--geo_cache", nargs='?', const="geocode_cache.json", default='',
+                        help="Cache reverse geocode results in this file (default geocode_cache.json) so points "
+                             "near one already looked up do not call the HERE API")
+    parser.add_argument("-p", "--precision", type=int, default=5,
+                        help="With -g or -t, geohash length of a cache cell: 4 is about 39 x 20 km, 5 about 5 x 5 km, "
+                             "6 about 1.2 x 0.6 km")
+    parser.add_argument("-m", "--max_entries", type=int, default=10000,
+                        help="With -g, maximum number of cached cells, the least recently used are evicted")
+    parser.add_argument("-t", "--track", type=int, default=0,
+                        help="Reverse geocode a ground track of this many ISS positions sampled every -i seconds, "
+                             "one lookup per -p geohash cell, written to -o as they complete")
+    parser.add_argument("-i", "--interval", type=float, default=1.0, help="With -t, seconds between two positions")
+    parser.add_argument("-P", "--positions_file", default='',
+                        help="With -t, read the positions from this JSON Lines file instead of sampling them")
+    parser.add_argument("-o", "--output", default="iss_track.jsonl", help="With -t, JSON Lines results file")
+    parser.add_argument("-q", "--quota", type=float, default=5.0,
+                        help="With -t, HERE API calls per second allowed by your plan")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="With -t, concurrent reverse geocode calls")
     arguments = parser.parse_args()
     main()
@@ -13,16 +13,27 @@ __copyright__ = "Copyright (c) 2018 Claudia"
 __license__ = "Python"
 
 import argparse
+import collections
+import json
 import os
 import getpass
+import time
 import warnings
 # This disables warnings
 # InsecureRequestWarning: Unverified HTTPS request is being made to host 'sbx-nxos-mgmt.cisco.com'
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
-from nornir import InitNornir
-from nornir.plugins.tasks.networking import netmiko_send_command
-from nornir.plugins.tasks.networking import napalm_get
-from nornir.plugins.functions.text import print_result
+
+import fact_cache
+import fact_store
+import result_sink
+import run_metrics
+
+# nornir, its task plugins and the helper modules built on them (batch_collect, host_scheduler, parse_pool) are
+# imported by the functions which use them.  Loading nornir takes most of the script's startup time and the
+# credential functions, the -s prompts and the argument parsing do not need it.
+
+# Effective username/password pair for a host.  Identical pairs are interned so hosts share one object.
+Creds = collections.namedtuple('Creds', ['username', 'password'])
 
 # nornir will pick up NAPALM_USERNAME and NAPALM_PASSWORD environment variable
 # export NETUSER=cisco
@@ -31,21 +42,25 @@ from nornir.plugins.functions.text import print_result
 # unset NETUSER
 # unset NETPASS
 
-def set_env(desc="Username", debug=True):
+def set_env(desc="Username", debug=True, environ=None):
+    # environ: Optional mapping to set the variable in instead of os.environ, such as an add_2env.EnvOverlay layer
 
     env_var = input(f"\nPlease enter {desc} environment variable name:\n")
 
     env_var_value = input(f"Please enter {desc} environment variable value:\n")
 
-    os.environ[env_var] = env_var_value
+    if environ is None:
+        environ = os.environ
+    environ[env_var] = env_var_value
 
     if debug:
-        print(f'{env_var}={os.environ[env_var]} environment variable has been set.\n')
+        print(f'{env_var}={environ[env_var]} environment variable has been set.\n')
 
 
-def set_creds(self, prefix="None", context="default"):
+def set_creds(self, prefix="None", context="default", source=None):
     """ Check for username and password env vars first.  If those
-    don't exist, then prompt user for creds.
+    don't exist, check the optional credential source (see cred_vault.CredentialSource) and then prompt user for
+    creds.
     CREDIT: Chris Crook ([@ctopher78](https://twitter.com/ctopher78)) Posted to Nornir Slack Channel Oct 18, 2019
     Note: "self" is the Nornir object for which we are setting credentials
     The context will define the object level:
@@ -82,6 +97,12 @@ def set_creds(self, prefix="None", context="default"):
     username = os.environ.get(usr)
     password = os.environ.get(pwd)
 
+    # Credentials missing from the environment are looked up in the credential source before prompting
+    source_usr = source_pwd = None
+    if source is not None and not (username and password):
+        source_name = context if context == "default" else prefix.upper()
+        source_usr, source_pwd = source.lookup([source_name]).get(source_name, [None, None])
+
     # Print current environment variables
     # print(os.environ)
 
@@ -89,7 +110,10 @@ def set_creds(self, prefix="None", context="default"):
     print(f"Username from env var is: {username}")
     print(f"Password from env var is: {password}\n")
 
-    if not username and not username_is_set:
+    if not username and not username_is_set and source_usr:
+        username = source_usr
+        print(f"\n\tUsername set via credential source {source_name} ")
+    elif not username and not username_is_set:
         uname = input(
             f"\nPlease enter username (or set `export {usr}=<your_username>` to avoid this message): "
         )
@@ -97,7 +121,10 @@ def set_creds(self, prefix="None", context="default"):
     else:
         print(f"\n\tUsername set via environmental variable {usr} ")
 
-    if not password and not password_is_set:
+    if not password and not password_is_set and source_pwd:
+        password = source_pwd
+        print(f"\n\tPassword set via credential source {source_name} ")
+    elif not password and not password_is_set:
         pwd = getpass.getpass(
             f"\nPlease enter password (or set `export {pwd}=<your_password>` to avoid this message): "
         )
@@ -114,17 +141,365 @@ def set_creds(self, prefix="None", context="default"):
         self.password = password
 
 
-def main():
+def index_env_creds(environ=None):
+    """
+    Scan the environment once and index every credential environment variable.
+
+    :param environ: Optional mapping to scan instead of os.environ
+    :return: dictionary keyed by uppercase group or device name with a [username, password] list as value.
+    The default credentials (NETUSER/NETPASS) are stored under the lowercase key "default" so they can never
+    collide with a <NAME>_USR/<NAME>_PWD pair.
+    """
+    if environ is None:
+        environ = os.environ
+
+    cred_index = {}
+    for key, value in environ.items():
+        if key.endswith("_USR"):
+            cred_index.setdefault(key[:-4], [None, None])[0] = value
+        elif key.endswith("_PWD"):
+            cred_index.setdefault(key[:-4], [None, None])[1] = value
+
+    cred_index["default"] = [environ.get("NETUSER"), environ.get("NETPASS")]
+
+    return cred_index
+
+
+def _own_attr(obj, attr):
+    # Nornir Hosts and Groups resolve username/password through their parent groups and the defaults
+    # Read the value set on the object itself
+    return object.__getattribute__(obj, attr)
+
+
+def resolve_creds(nr, environ=None, verbose=False, source=None):
+    """
+    Bulk credential resolver.  Scans the environment once (see index_env_creds) and assigns credentials to the
+    Nornir defaults, groups and hosts in a single pass over nr.inventory without printing or prompting per object.
+    With a credential source (see cred_vault.CredentialSource) the credentials of every group and host are fetched
+    in one batch lookup, environment variables take precedence over the source.
+
+    Values already set in the inventory are kept.  A <NAME>_USR/<NAME>_PWD pair only fills in what the group or
+    host does not define itself, so group and device environment variables take precedence over inherited values.
+
+    :param nr: Nornir object
+    :param environ: Optional mapping to use instead of os.environ
+    :param verbose: Optional parameter to enable (True) or disable (False) printed output to STDOUT
+    :param source: Optional credential source
+    :return: summary dictionary
+    RESOLVED: list of (context, name) tuples which had at least one credential set from an environment variable
+    or the credential source
+    INVENTORY: number of objects which already had both credentials in the inventory
+    MISSING: list of (context, name) tuples still without a username or password after resolution
+    ELAPSED: resolution time in seconds
+    """
+    start = time.perf_counter()
+    cred_index = index_env_creds(environ)
+
+    if source is not None:
+        names = ["default"] + [name.upper() for name in nr.inventory.groups] + \
+                [name.upper() for name in nr.inventory.hosts]
+        for name, (usr, pwd) in source.lookup(names).items():
+            index_creds = cred_index.setdefault(name, [None, None])
+            index_creds[0] = index_creds[0] or usr
+            index_creds[1] = index_creds[1] or pwd
+
+    summary = {'RESOLVED': [], 'INVENTORY': 0, 'MISSING': [], 'ELAPSED': 0.0}
+
+    defaults = nr.inventory.defaults
+    usr, pwd = cred_index["default"]
+    if defaults.username and defaults.password:
+        summary['INVENTORY'] += 1
+    else:
+        if (usr and not defaults.username) or (pwd and not defaults.password):
+            defaults.username = defaults.username or usr
+            defaults.password = defaults.password or pwd
+            summary['RESOLVED'].append(("default", "defaults"))
+        if not defaults.username or not defaults.password:
+            summary['MISSING'].append(("default", "defaults"))
+
+    for context, objects in (("group", nr.inventory.groups), ("device", nr.inventory.hosts)):
+        for name, obj in objects.items():
+            username = _own_attr(obj, "username")
+            password = _own_attr(obj, "password")
+            if username and password:
+                summary['INVENTORY'] += 1
+                continue
+
+            env_creds = cred_index.get(name.upper())
+            if env_creds:
+                if not username and env_creds[0]:
+                    obj.username = env_creds[0]
+                if not password and env_creds[1]:
+                    obj.password = env_creds[1]
+                summary['RESOLVED'].append((context, name))
+
+            # Inherited values are checked last, they are resolved through the parent groups and the defaults
+            if not obj.username or not obj.password:
+                summary['MISSING'].append((context, name))
+
+    summary['ELAPSED'] = time.perf_counter() - start
+
+    if verbose:
+        print(f"\n============= Bulk Credential Resolution =============")
+        print(f"Resolved from environment variables{' and credential source' if source is not None else ''}: "
+              f"{len(summary['RESOLVED'])}")
+        print(f"Already set in inventory: {summary['INVENTORY']}")
+        print(f"Missing credentials: {len(summary['MISSING'])}")
+        for context, name in summary['MISSING'][:20]:
+            print(f"\t{context} {name}")
+        if len(summary['MISSING']) > 20:
+            print(f"\t... and {len(summary['MISSING']) - 20} more")
+        print(f"Resolution time: {summary['ELAPSED']:.4f} seconds\n")
+
+    return summary
+
+
+def missing_cred_scopes(nr, summary=None):
+    """
+    Group every host still missing a username or password by the highest credential scope missing it.
+
+    A host inherits credentials from its groups (including their parent groups) and then from the defaults, so the
+    scopes are checked from the top: the defaults, then the groups of the host in order, then the host itself.  The
+    first one which does not define the missing value is where a single answer fills the gap of every host below
+    it, so for example the defaults are prompted once instead of every group which inherits from them.
+
+    :param nr: Nornir object
+    :param summary: Optional summary returned by resolve_creds.  When given only the hosts in its MISSING scopes
+    (every host when the defaults or a group is missing) are checked.
+    :return: dictionary keyed by (context, name) scope tuples with the list of affected host names as value
+    """
+    if summary is not None and all(context == "device" for context, name in summary['MISSING']):
+        host_names = [name for context, name in summary['MISSING']]
+    else:
+        host_names = list(nr.inventory.hosts.keys())
+
+    defaults = nr.inventory.defaults
+
+    def chain(group):
+        # The group and then its parent groups, in the order Nornir resolves them
+        yield group
+        for parent in group.groups.refs:
+            yield from chain(parent)
+
+    scopes = {}
+    for name in host_names:
+        host = nr.inventory.hosts[name]
+        missing = [attr for attr in ("username", "password") if not getattr(host, attr)]
+        if not missing:
+            continue
+        candidates = [(("default", "defaults"), defaults)]
+        for group in host.groups.refs:
+            candidates.extend((("group", parent.name), parent) for parent in chain(group))
+        candidates.append((("device", name), host))
+        for scope, obj in candidates:
+            if any(not _own_attr(obj, attr) for attr in missing):
+                scopes.setdefault(scope, []).append(name)
+                break
+
+    return scopes
+
+
+def prompt_missing_creds(nr, scopes):
+    """
+    Prompt once per unique credential scope and only then apply all the answers to the inventory in one batch,
+    so nr.run never starts while credentials are still being collected.
+
+    :param nr: Nornir object
+    :param scopes: dictionary returned by missing_cred_scopes
+    :return: dictionary keyed by scope with the (username, password) that was applied
+    """
+    answers = {}
+    for (context, name), host_names in scopes.items():
+        if context == "default":
+            scope_obj = nr.inventory.defaults
+            usr = "NETUSER"
+            pwd = "NETPASS"
+        else:
+            scope_obj = nr.inventory.groups[name] if context == "group" else nr.inventory.hosts[name]
+            usr = f"{name.upper()}_USR"
+            pwd = f"{name.upper()}_PWD"
+
+        print(f"\n============= Missing Credentials for {context} {name} ({len(host_names)} hosts) =============")
+        username = scope_obj.username
+        password = scope_obj.password
+        if not username:
+            username = input(
+                f"\nPlease enter username (or set `export {usr}=<your_username>` to avoid this message): "
+            )
+        if not password:
+            password = getpass.getpass(
+                f"\nPlease enter password (or set `export {pwd}=<your_password>` to avoid this message): "
+            )
+        answers[(context, name)] = (username, password)
+
+    for (context, name), (username, password) in answers.items():
+        if context == "default":
+            scope_obj = nr.inventory.defaults
+        elif context == "group":
+            scope_obj = nr.inventory.groups[name]
+        else:
+            scope_obj = nr.inventory.hosts[name]
+        scope_obj.username = username
+        scope_obj.password = password
+
+    return answers
+
+
+def inherit_creds(nr, verbose=False):
+    """
+    Resolve the effective credentials of every host once, following the Nornir inheritance order
+    host -> groups (in order, including parent groups) -> defaults, into a side mapping (HOSTS in the summary).
+
+    Each group is resolved only once no matter how many hosts use it and identical username/password pairs are
+    interned, so thousands of hosts inheriting from a few groups share the same Creds object and strings.  Only the
+    values a host defines itself are replaced by the interned strings, inherited values are left to Nornir so a
+    later change to a group or the defaults still reaches its hosts.
+
+    :param nr: Nornir object
+    :param verbose: Optional parameter to enable (True) or disable (False) printed output to STDOUT
+    :return: summary dictionary
+    HOSTS: dictionary of host name to its interned Creds
+    SCOPES: dictionary of (context, name) scope to number of hosts whose credentials come from that scope
+    (hosts with their own credentials are counted under ("device", "hosts"))
+    UNIQUE: number of distinct Creds objects
+    """
+    interned = {}
+    defaults = nr.inventory.defaults
+    default_scope = ("default", "defaults")
+
+    # For every attribute keep the value and the scope it came from
+    group_cache = {}
+
+    def resolve_group(group):
+        if group.name not in group_cache:
+            attrs = []
+            for attr in ("username", "password"):
+                value, scope = _own_attr(group, attr), ("group", group.name)
+                if value is None:
+                    value, scope = getattr(defaults, attr), default_scope
+                    for parent in group.groups.refs:
+                        parent_value, parent_scope = resolve_group(parent)[len(attrs)]
+                        if parent_value is not None:
+                            value, scope = parent_value, parent_scope
+                            break
+                attrs.append((value, scope))
+            group_cache[group.name] = attrs
+        return group_cache[group.name]
+
+    summary = {'HOSTS': {}, 'SCOPES': collections.Counter(), 'UNIQUE': 0}
+
+    for name, host in nr.inventory.hosts.items():
+        attrs = []
+        for attr in ("username", "password"):
+            value, scope = _own_attr(host, attr), ("device", "hosts")
+            if value is None:
+                value, scope = getattr(defaults, attr), default_scope
+                for group in host.groups.refs:
+                    group_value, group_scope = resolve_group(group)[len(attrs)]
+                    if group_value is not None:
+                        value, scope = group_value, group_scope
+                        break
+            attrs.append((value, scope))
+
+        (username, usr_scope), (password, pwd_scope) = attrs
+        creds = interned.setdefault((username, password), Creds(username, password))
+        if usr_scope[0] == "device":
+            host.username = creds.username
+        if pwd_scope[0] == "device":
+            host.password = creds.password
+        summary['HOSTS'][name] = creds
+        # Count the most specific scope involved when username and password come from different levels
+        scope = usr_scope if usr_scope[0] == "device" or pwd_scope[0] == "default" else pwd_scope
+        summary['SCOPES'][scope] += 1
+
+    summary['SCOPES'] = dict(summary['SCOPES'])
+    summary['UNIQUE'] = len(interned)
+
+    if verbose:
+        print(f"\n============= Credential Inheritance =============")
+        print(f"{len(summary['HOSTS'])} hosts share {summary['UNIQUE']} unique credential pairs")
+        for (context, scope_name), count in sorted(summary['SCOPES'].items(), key=lambda item: -item[1]):
+            print(f"\t{context} {scope_name}: {count} hosts")
+
+    return summary
 
-    nr = InitNornir(config_file='config.yaml')
+
+def main():
+    from nornir import InitNornir
 
     # For Windows systems, set the env variables within the scope of the script
-    # This is executed when the script is run with the -s option
+    # This is executed when the script is run with the -s option, the prompts come up before nornir is initialized
     if arguments.set_envs:
         set_env(desc="Username")
         set_env(desc="Password")
 
-    set_creds(nr)
+    # Phase timings are always recorded, they are only written out with the -M option
+    metrics = run_metrics.RunMetrics(profile_phases=("credentials", "results") if arguments.profile else ())
+
+    with metrics.phase("init_nornir"):
+        if arguments.inventory_cache:
+            # Load the compiled inventory snapshot instead of parsing the YAML files when they have not changed
+            nr = InitNornir(config_file='config.yaml', inventory={"plugin": "inventory_cache.CachedInventory"})
+        else:
+            nr = InitNornir(config_file='config.yaml')
+
+    if arguments.groups or arguments.platforms or arguments.names:
+        # Only the selected hosts get credentials and are collected from.  The script selects once, so one nr.filter
+        # pass is cheaper than building the InventoryIndex the collector daemon uses
+        import inventory_index
+        with metrics.phase("select"):
+            num_hosts = len(nr.inventory.hosts)
+            nr = inventory_index.filter_hosts(nr, groups=arguments.groups, platforms=arguments.platforms,
+                                              names=arguments.names)
+        print(f"Selected {len(nr.inventory.hosts)} of {num_hosts} hosts")
+
+    source = None
+    if arguments.vault:
+        # Credentials not set as environment variables are read from the encrypted vault
+        import cred_vault
+        source = cred_vault.VaultSource(arguments.vault)
+
+    if arguments.bulk:
+        with metrics.phase("credentials"):
+            summary = resolve_creds(nr, verbose=True, source=source)
+            # Anything still missing is requested up front, once per credential scope, before any connection is made
+            if summary['MISSING']:
+                prompt_missing_creds(nr, missing_cred_scopes(nr, summary))
+            inherit_creds(nr, verbose=True)
+    else:
+        with metrics.phase("credentials"):
+            set_default_group_host_creds(nr, source=source)
+
+    if arguments.auth_check:
+        # Log into one host per credential scope before the run, hosts with rejected credentials are re-prompted
+        # or left out instead of each spending a full connect timeout
+        import cred_preflight
+        with metrics.phase("preflight"):
+            preflight = cred_preflight.preflight(nr)
+            if preflight['FAILED'] and arguments.auth_check == "prompt":
+                cred_preflight.reprompt_failed(nr, preflight)
+            cred_preflight.print_report(preflight)
+            skipped = cred_preflight.failed_hosts(preflight)
+            if skipped:
+                nr = nr.filter(filter_func=lambda host: host.name not in skipped)
+
+    run_getters(nr, metrics)
+
+    if arguments.metrics:
+        files = metrics.write(arguments.metrics)
+        print(f"\nRun metrics written to {', '.join(files)}")
+
+
+def set_default_group_host_creds(nr, source=None):
+
+    if source is not None:
+        # Fetch every name in one batch and serve the per object lookups below from that result, so they never go
+        # back to the source however large the inventory is
+        import cred_vault
+        source = cred_vault.MappingSource(source.lookup(["default"] + [name.upper() for name in nr.inventory.groups] +
+                                                        [name.upper() for name in nr.inventory.hosts]))
+
+    set_creds(nr, source=source)
     # print(dir(nr))
     # print(dir(nr.inventory))
     # print(dir(nr.inventory.defaults))
@@ -139,7 +514,7 @@ def main():
         # print(f'is username set {my_groups[i].username}')
         # print(f'is password set {my_groups[i].password}')
         if not my_groups[i].username or not my_groups[i].password:
-            set_creds(my_groups[i], prefix=i, context="group")
+            set_creds(my_groups[i], prefix=i, context="group", source=source)
             # export UWACO_NETWORK_USR=cisco
             # export UWACO_NETWORK_PWD=cisco
 
@@ -153,17 +528,127 @@ def main():
         # print(f"- {i}")
         # print(f"dir of {i} is {dir(my_hosts[i])}")
         if not my_hosts[i].username:
-            set_creds(my_hosts[i], prefix=i, context="device")
+            set_creds(my_hosts[i], prefix=i, context="device", source=source)
             # devnet_sandbox_iosxe
             # export DEVNET_SANDBOX_IOSXE_USR=cisco
             # export DEVNET_SANDBOX_IOSXE=cisco
 
     print("\n")
 
-    print(f"Logging into hosts in inventory and getting napalm facts...")
-    result = nr.run(
-        napalm_get,
-        getters=['get_facts'])
+
+def run_getters(nr, metrics):
+    from nornir.plugins.tasks.networking import napalm_get
+
+    import batch_collect
+    import host_scheduler
+
+    print(f"Logging into hosts in inventory and getting napalm {', '.join(arguments.getters)}...")
+
+    processors = []
+
+    pipeline = None
+    if arguments.templates:
+        # Raw output is collected by the worker threads and parsed with TextFSM in a separate process pool
+        import parse_pool
+        templates = dict(pair.split("=", 1) for pair in arguments.templates)
+        arguments.commands = list(dict.fromkeys(arguments.commands + list(templates)))
+        pipeline = parse_pool.ParsePipeline(templates)
+        pipeline.start()
+        processors.append(pipeline)
+
+    cache = None
+    cached = stale = None
+    if arguments.cache_ttl:
+        # Only poll hosts whose cached facts are missing or older than the TTL
+        cache = fact_cache.FactCache(ttl=arguments.cache_ttl, getters=arguments.getters, commands=arguments.commands)
+        cached, stale = cache.split(nr)
+        print(f"{len(cached)} hosts served from {cache.path}, polling {len(stale)} hosts...")
+        nr = nr.filter(filter_func=lambda host: host.name in stale)
+        # The cache stores the facts before the sink can drop them
+        processors.append(cache)
+
+    store = None
+    if arguments.fact_store:
+        # Keep the facts of the whole fleet in compact typed columns
+        store = fact_store.FactStore()
+        processors.append(store)
+        if cached:
+            # Hosts served from the fact cache are not polled, their cached facts go straight into the store
+            for name, entry in cached.items():
+                store.add_collected(name, entry["facts"])
+
+    sink = None
+    if arguments.jsonl:
+        # Stream each host's facts to a JSON Lines file as soon as the host completes
+        sink = result_sink.JsonLinesSink(arguments.jsonl, drop_results=arguments.drop_results)
+        processors.append(sink)
+
+    if processors:
+        nr = nr.with_processors(processors)
+
+    timings = {}
+    with metrics.phase("collect"):
+        if arguments.latency_schedule:
+            # Start the historically slowest hosts first and adapt the worker count to earlier runs
+            result = host_scheduler.scheduled_run(nr, getters=arguments.getters, commands=arguments.commands,
+                                                  timings=timings, max_workers=arguments.max_workers or None)
+        elif arguments.metrics:
+            # Same collection as below with the per host connect and getter times recorded
+            result = nr.run(
+                host_scheduler.timed_napalm_get,
+                getters=arguments.getters,
+                commands=arguments.commands,
+                timings=timings)
+        elif arguments.commands or len(arguments.getters) > 1:
+            # All getters and CLI commands over one pooled connection per host
+            result = nr.run(
+                batch_collect.collect_batch,
+                getters=arguments.getters,
+                commands=arguments.commands)
+        else:
+            result = nr.run(
+                napalm_get,
+                getters=arguments.getters)
+    metrics.observe_hosts(timings)
+
+    with metrics.phase("results"):
+        report_results(result, cache, cached, stale, store, pipeline, sink)
+
+
+def report_results(result, cache, cached, stale, store, pipeline, sink):
+    from nornir.plugins.functions.text import print_result
+
+    if cache:
+        cache.save()
+
+    if store:
+        if arguments.fact_store.endswith(".csv"):
+            store.to_csv(arguments.fact_store)
+        elif arguments.fact_store.endswith(".parquet"):
+            store.to_parquet(arguments.fact_store)
+        else:
+            store.save(arguments.fact_store)
+        print(f"Facts for {len(store)} hosts exported to {arguments.fact_store}")
+        for os_version, count in store.count_by("os_version").items():
+            print(f"\t{os_version}: {count} hosts")
+
+    if pipeline:
+        try:
+            for host, command, rows in pipeline.records():
+                print(json.dumps({"host": host, "command": command, "parsed": rows}))
+            for host, command, error in pipeline.errors:
+                print(json.dumps({"host": host, "command": command, "error": error}))
+        finally:
+            pipeline.close()
+
+    if sink:
+        sink.close()
+        print(f"napalm facts for {sink.written} hosts ({sink.failed} failed) written to {sink.path}")
+        return
+
+    if cache:
+        fact_cache.print_report(cache.report(cached, stale))
+        return
 
     print(f"napalm facts stored in the variable 'result'...{result}")
     # Printing now may help you decompose the resulting objects
@@ -178,6 +663,67 @@ if __name__ == '__main__':
     parser.add_argument('-s', '--set_envs', action='store_true', default=False, help='When True, script will prompt for '
                                                                                      'Username and Password to set as '
                                                                                      'Environment Variables')
+    parser.add_argument('-b', '--bulk', action='store_true', default=False, help='Resolve all credentials from '
+                                                                                 'environment variables in a single '
+                                                                                 'pass and prompt once per missing '
+                                                                                 'credential scope before connecting')
+    parser.add_argument('-V', '--vault', default='',
+                        help='Encrypted credential vault file (see cred_vault.py) to read the credentials which '
+                             'are not set as environment variables from')
+    parser.add_argument('-g', '--groups', nargs='+', default=[],
+                        help='Only run against the hosts in these groups (or their child groups)')
+    parser.add_argument('-p', '--platforms', nargs='+', default=[],
+                        help='Only run against the hosts with these platforms, combined with -g and -n')
+    parser.add_argument('-n', '--names', nargs='+', default=[],
+                        help='Only run against the hosts whose name matches one of these glob patterns '
+                             '("ios-xe-*"), combined with -g and -p')
+    parser.add_argument('-a', '--auth_check', nargs='?', const='skip', default='', choices=['skip', 'prompt'],
+                        help='Log into one host per unique credential scope concurrently before the run and skip '
+                             '(default) or re-prompt the hosts whose credentials are rejected')
+    parser.add_argument('-l', '--latency_schedule', action='store_true', default=False,
+                        help='Start the historically slowest hosts first and adjust the number of workers using '
+                             'the timings saved in run_history.json')
+    parser.add_argument('-W', '--max_workers', type=int, default=0,
+                        help='With -l, highest number of workers (default 4 times the configured num_workers)')
+    parser.add_argument('-G', '--getters', nargs='+', default=['get_facts'],
+                        help='napalm getters to collect, all of them run over one connection per host')
+    parser.add_argument('-C', '--commands', nargs='+', default=[],
+                        help='CLI commands to send over the same connection as the getters')
+    parser.add_argument('-T', '--templates', nargs='+', default=[],
+                        help='"COMMAND=TEMPLATE" pairs.  The commands are collected and their output parsed with '
+                             'the TextFSM template in a process pool')
+    parser.add_argument('-F', '--fact_store', default='',
+                        help='Collect get_facts into the compact column store and export it to this file '
+                             '(.csv, .parquet or the native column file for any other extension)')
+    parser.add_argument('-i', '--inventory_cache', action='store_true', default=False,
+                        help='Load the inventory from a compiled snapshot which is rebuilt whenever hosts.yaml, '
+                             'groups.yaml or defaults.yaml change')
+    parser.add_argument('-c', '--cache_ttl', type=int, default=0,
+                        help='Serve facts collected less than this many seconds ago from fact_cache.json and only '
+                             'poll hosts with stale or missing facts')
+    parser.add_argument('-j', '--jsonl', default='', help='Write each host\'s facts to this JSON Lines file as soon '
+                                                         'as the host completes instead of printing the results')
+    parser.add_argument('-d', '--drop_results', action='store_true', default=False,
+                        help='With -j, drop each host\'s facts from memory once they are written')
+    parser.add_argument('-M', '--metrics', default='',
+                        help='Write phase timings, per host latency histograms and the failure count to '
+                             '<METRICS>.json and <METRICS>.prom (Prometheus text format)')
+    parser.add_argument('-P', '--profile', action='store_true', default=False,
+                        help='With -M, also capture cProfile and tracemalloc data for the credential and result '
+                             'phases (<METRICS>_<phase>.pstats)')
 
     arguments = parser.parse_args()
+    for pair in arguments.templates:
+        # Checked before any device is contacted, a missing template would otherwise only show up at parse time
+        command, _, template = pair.partition("=")
+        if not command or not template:
+            parser.error(f"-T/--templates expects \"<command>=<template file>\", got {pair!r}")
+        if not os.path.isfile(template):
+            parser.error(f"-T/--templates: template file {template!r} for {command!r} does not exist")
+    if arguments.profile and not arguments.metrics:
+        # The profiles are written next to the metrics files, without -M there is nowhere to put them
+        parser.error("-P/--profile requires -M/--metrics")
+    if arguments.drop_results and not arguments.jsonl:
+        # Without -j the dropped results would not be written anywhere
+        parser.error("-d/--drop_results requires -j/--jsonl")
     main()
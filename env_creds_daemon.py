@@ -0,0 +1,236 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: env_creds_daemon
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import argparse
+import getpass
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import warnings
+warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+
+# nornir, napalm and env_creds are only imported by the daemon (see start_daemon) so the collect client starts
+# with nothing but the standard library
+
+# Jobs are sent as one JSON line, for example:
+# {"getters": ["get_facts", "get_interfaces"], "hosts": ["ios-xe-mgmt"]}
+# {"getters": ["get_facts"], "platforms": ["nxos"]}
+# {"getters": ["get_facts"], "groups": ["devnet_sandbox_iosxe"], "hosts": ["ios-xe-*"]}
+# {"getters": ["get_facts"], "filter": {"port": 443}}
+# {"getters": ["get_facts"], "commands": ["show version"], "hosts": ["sbx-nxos-mgmt"]}
+# Each host's result is streamed back as one JSON line as soon as it completes, followed by a summary line:
+# {"done": true, "hosts": 2, "failed": 0}
+
+
+def default_socket_path():
+    """
+    Socket path in the per user runtime directory ($XDG_RUNTIME_DIR, only readable by its owner) or, when it is not
+    set, in a env_creds-<user> directory of the temporary directory which the daemon creates with mode 0700.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"env_creds-{getpass.getuser()}")
+    return os.path.join(runtime_dir, "env_creds.sock")
+
+
+def collect_with_reconnect(task, **kwargs):
+    """
+    collect_batch over the connection kept open from an earlier job.  A device may have dropped an idle session, so
+    when the job fails on a reused connection, the connection is closed and the job retried once over a new one.
+    """
+    import batch_collect
+
+    reused = "napalm" in task.host.connections
+    try:
+        result = batch_collect.collect_batch(task, **kwargs)
+        if not (reused and result.failed):
+            return result
+    except Exception:
+        if not reused:
+            raise
+    try:
+        task.host.close_connection("napalm")
+    except Exception:
+        # Closing a dead session can fail too, the connection is already out of the pool
+        task.host.connections.pop("napalm", None)
+    return batch_collect.collect_batch(task, **kwargs)
+
+
+class CollectorHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        import result_sink
+
+        try:
+            job = json.loads(self.rfile.readline())
+        except ValueError as e:
+            self._reply({"done": True, "error": f"Invalid job: {e}"})
+            return
+
+        if job.get("command") == "shutdown":
+            self._reply({"done": True, "shutdown": True})
+            threading.Thread(target=self.server.shutdown).start()
+            return
+
+        # Host names (or glob patterns), groups and platforms are looked up in the index built at startup
+        nr = self.server.index.filter(self.server.nr, groups=job.get("groups", []),
+                                      platforms=job.get("platforms", []), names=job.get("hosts", []))
+        if job.get("filter"):
+            nr = nr.filter(**job["filter"])
+
+        sink = result_sink.JsonLinesSink(_TextStream(self.wfile))
+        # Open device connections are shared by all jobs, so jobs run one at a time
+        with self.server.job_lock:
+            result = nr.with_processors([sink]).run(collect_with_reconnect,
+                                                    getters=job.get("getters", ["get_facts"]),
+                                                    commands=job.get("commands", []), on_failed=True)
+        self._reply({"done": True, "hosts": len(result), "failed": len(result.failed_hosts)})
+
+    def _reply(self, record):
+        self.wfile.write((json.dumps(record, default=str) + "\n").encode())
+
+
+class _TextStream(object):
+    # The handler stream is binary, the result sink writes text lines
+    name = "<socket>"
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        self.stream.write(text.encode())
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CollectorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix domain socket server keeping the initialized Nornir object, the resolved credentials and the open
+    device connections alive between jobs.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, nr):
+        import inventory_index
+
+        self.nr = nr
+        # Built once, jobs selecting a few hosts do not go through the whole inventory
+        self.index = inventory_index.InventoryIndex(nr.inventory)
+        self.job_lock = threading.Lock()
+        socket_dir = os.path.dirname(socket_path)
+        if socket_dir:
+            os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        # Only the owner may submit jobs, the daemon holds device credentials.  The socket is created owner only
+        # by the umask instead of changing it after bind, which would leave it open to anyone in between.
+        umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, CollectorHandler)
+        finally:
+            os.umask(umask)
+
+
+def collect(socket_path, getters=None, commands=None, hosts=None, filter=None, groups=None, platforms=None):
+    """
+    Client side.  Send one job to the daemon and yield each host's record as it is streamed back.
+    The last record is the {"done": true, ...} summary.
+    """
+    job = {"getters": getters or ["get_facts"], "commands": commands or [], "hosts": hosts or [],
+           "groups": groups or [], "platforms": platforms or [], "filter": filter or {}}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(job) + "\n").encode())
+        with sock.makefile("r") as reader:
+            for line in reader:
+                yield json.loads(line)
+
+
+def shutdown(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(b'{"command": "shutdown"}\n')
+        sock.recv(1024)
+
+
+def start_daemon(socket_path, config_file='config.yaml', inventory_cache=False, fake=False):
+    from nornir import InitNornir
+    import env_creds
+
+    if inventory_cache:
+        nr = InitNornir(config_file=config_file, inventory={"plugin": "inventory_cache.CachedInventory"})
+    else:
+        nr = InitNornir(config_file=config_file)
+
+    if fake:
+        import fake_napalm
+        fake_napalm.use_fake_napalm()
+
+    # Resolve every credential once, prompting up front, so jobs never wait on an operator
+    summary = env_creds.resolve_creds(nr, verbose=True)
+    if summary['MISSING']:
+        env_creds.prompt_missing_creds(nr, env_creds.missing_cred_scopes(nr, summary))
+    env_creds.inherit_creds(nr, verbose=True)
+
+    server = CollectorServer(socket_path, nr)
+    print(f"Collector daemon listening on {socket_path} for {len(nr.inventory.hosts)} hosts...")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+        nr.close_connections(on_failed=True)
+
+
+def main():
+
+    if arguments.command == "serve":
+        start_daemon(arguments.socket, inventory_cache=arguments.inventory_cache, fake=arguments.fake)
+    elif arguments.command == "shutdown":
+        shutdown(arguments.socket)
+    else:
+        for record in collect(arguments.socket, getters=arguments.getters, commands=arguments.commands,
+                              hosts=arguments.names, groups=arguments.groups, platforms=arguments.platforms):
+            print(json.dumps(record, default=str))
+
+
+# Standard call to the main() function.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Warm worker daemon for env_creds",
+                                     epilog="Usage: ' python env_creds_daemon.py serve' then "
+                                            "' python env_creds_daemon.py collect -G get_facts -n ios-xe-mgmt' ")
+    parser.add_argument('command', choices=['serve', 'collect', 'shutdown'], help='Start the daemon, send it a '
+                                                                                  'collection job or stop it')
+    parser.add_argument('-S', '--socket', default=default_socket_path(),
+                        help='Unix domain socket path (default env_creds.sock in $XDG_RUNTIME_DIR)')
+    # Same flags as env_creds.py
+    parser.add_argument('-G', '--getters', nargs='+', default=['get_facts'], help='napalm getters to collect')
+    parser.add_argument('-C', '--commands', nargs='+', default=[], help='CLI commands to send over the same '
+                                                                        'connection as the getters')
+    parser.add_argument('-n', '--names', nargs='+', default=[],
+                        help='Hosts or host name glob patterns to collect from (default all)')
+    parser.add_argument('-g', '--groups', nargs='+', default=[], help='Only collect from the hosts in these groups')
+    parser.add_argument('-p', '--platforms', nargs='+', default=[],
+                        help='Only collect from the hosts with these platforms')
+    parser.add_argument('-i', '--inventory_cache', action='store_true', default=False,
+                        help='Load the inventory from the compiled inventory cache')
+    parser.add_argument('-f', '--fake', action='store_true', default=False,
+                        help='Use the offline fake NAPALM driver (local testing)')
+    arguments = parser.parse_args()
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: fact_cache
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import base_processor
+
+
+class FactCache(base_processor.BaseProcessor):
+    """
+    Local on disk cache of napalm facts with a per host time to live (TTL).
+
+    Entries are keyed by host name and a hash of the inventory attributes used to reach the device (hostname, port,
+    platform and groups) and of what is collected (getters, CLI commands and getter options), so changing any of
+    them invalidates the cached facts.  Results where a getter or command failed are not cached.
+
+    The cache is also a Nornir processor, so it can be passed to nr.with_processors to store each host's facts as
+    soon as that host completes.
+
+    :param path: JSON file holding the cache
+    :param ttl: Time to live of an entry in seconds
+    :param getters: napalm getters collected in this run
+    :param commands: CLI commands collected in this run
+    :param getters_options: Optional dictionary of getter name to keyword arguments for that getter
+    """
+
+    def __init__(self, path="fact_cache.json", ttl=3600, getters=(), commands=(), getters_options=None):
+        self.path = path
+        self.ttl = ttl
+        self.collected = [sorted(getters), sorted(commands), getters_options or {}]
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def host_key(self, host):
+        attrs = [host.hostname, host.port, host.platform, list(host.groups)] + self.collected
+        return hashlib.sha1(json.dumps(attrs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, host, now=None):
+        # Return the cache entry for the host or None if it is missing, expired or the inventory changed
+        entry = self.entries.get(host.name)
+        if entry is None or entry["key"] != self.host_key(host):
+            return None
+        if (now or time.time()) - entry["collected"] > self.ttl:
+            return None
+        return entry
+
+    def split(self, nr):
+        """
+        :return: dictionary of host name to cache entry for fresh hosts and the set of host names to poll
+        """
+        now = time.time()
+        cached = {}
+        stale = set()
+        for name, host in nr.inventory.hosts.items():
+            entry = self.get(host, now)
+            if entry is None:
+                stale.add(name)
+            else:
+                cached[name] = entry
+        return cached, stale
+
+    def store(self, host, facts):
+        with self._lock:
+            self.entries[host.name] = {"key": self.host_key(host), "collected": time.time(), "facts": facts}
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, default=str)
+
+    def report(self, cached, polled):
+        """
+        Combine the cached and freshly collected facts.
+
+        :param cached: dictionary returned by split
+        :param polled: host names which were polled in this run
+        :return: dictionary of host name to {"source": "cache" | "fresh" | "failed", "age": seconds, "facts": ...}
+        """
+        now = time.time()
+        combined = {}
+        for name, entry in cached.items():
+            combined[name] = {"source": "cache", "age": now - entry["collected"], "facts": entry["facts"]}
+        for name in polled:
+            entry = self.entries.get(name)
+            if entry is not None and now - entry["collected"] <= self.ttl:
+                combined[name] = {"source": "fresh", "age": now - entry["collected"], "facts": entry["facts"]}
+            else:
+                combined[name] = {"source": "failed", "age": None, "facts": None}
+        return combined
+
+    def task_instance_completed(self, task, host, result):
+        # Partial results (see batch_collect.collect_batch) are polled again on the next run
+        if not result.failed and not getattr(result[0], "errors", None):
+            self.store(host, result.result)
+
+
+def print_report(report):
+
+    print(f"\n============= Facts Report ({len(report)} hosts) =============")
+    for name, entry in report.items():
+        if entry["source"] == "cache":
+            source = f"cache, {entry['age'] / 60:.0f} min old"
+        else:
+            source = entry["source"]
+        print(f"[{source}] {name}: {json.dumps(entry['facts'], default=str)}")
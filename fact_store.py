@@ -0,0 +1,227 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: fact_store
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import array
+import collections
+import csv
+import json
+import struct
+import threading
+
+import base_processor
+
+# get_facts fields stored as dictionary encoded string columns (array of codes plus the list of distinct values)
+STRING_COLUMNS = ("hostname", "fqdn", "vendor", "model", "os_version", "serial_number")
+# get_facts fields stored as numeric columns, NaN marks a missing value
+NUMBER_COLUMNS = ("uptime",)
+
+_FILE_MAGIC = b"FACTCOL1"
+
+
+class StringColumn(object):
+    """
+    Dictionary encoded string column.  Fleet wide facts such as vendor, model or os_version only have a handful of
+    distinct values, so each row costs one 4 byte code instead of a Python string in a nested dictionary.
+    """
+
+    def __init__(self):
+        self.codes = array.array("I")
+        self.values = []
+        self._lookup = {}
+
+    def _code(self, value):
+        value = "" if value is None else str(value)
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def __setitem__(self, index, value):
+        self.codes[index] = self._code(value)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def code_of(self, value):
+        return self._lookup.get(value)
+
+
+class FactStore(base_processor.BaseProcessor):
+    """
+    Compact column store of get_facts results keyed by host index.
+
+    The store is also a Nornir processor, pass it to nr.with_processors to add each host's facts as soon as that
+    host completes (the facts can then be dropped from the Result objects, see result_sink.JsonLinesSink).
+
+    Usage:
+        store = FactStore()
+        nr.with_processors([store]).run(napalm_get, getters=['get_facts'])
+        store.count_by("os_version")
+        store.filter(vendor="Cisco", model="C9300")
+        store.to_csv("facts.csv")
+    """
+
+    def __init__(self):
+        self.hosts = []
+        self.host_index = {}
+        self.columns = {name: StringColumn() for name in STRING_COLUMNS}
+        self.columns.update({name: array.array("d") for name in NUMBER_COLUMNS})
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def add(self, host, facts):
+        # One row per host, adding a host already in the store replaces its row
+        with self._lock:
+            index = self.host_index.get(host)
+            if index is None:
+                self.host_index[host] = len(self.hosts)
+                self.hosts.append(host)
+            for name in STRING_COLUMNS:
+                self._set(self.columns[name], index, facts.get(name))
+            for name in NUMBER_COLUMNS:
+                value = facts.get(name)
+                self._set(self.columns[name], index, float("nan") if value is None else float(value))
+
+    @staticmethod
+    def _set(column, index, value):
+        if index is None:
+            column.append(value)
+        else:
+            column[index] = value
+
+    def add_collected(self, host, collected):
+        """
+        Add the get_facts of a host from what napalm_get or batch_collect.collect_batch returned (or a fact cache
+        entry), anything without facts is ignored.
+
+        :param collected: dictionary keyed by getter name
+        """
+        if not isinstance(collected, dict):
+            return
+        facts = collected.get("get_facts") or collected.get("facts")
+        if facts and "error" not in facts:
+            self.add(host, facts)
+
+    def row(self, index):
+        record = {"host": self.hosts[index]}
+        for name, column in self.columns.items():
+            record[name] = column[index]
+        return record
+
+    def get(self, host):
+        return self.row(self.host_index[host])
+
+    def filter(self, **conditions):
+        """
+        :param conditions: column=value pairs, all of them must match
+        :return: list of matching host indexes
+        """
+        indexes = range(len(self.hosts))
+        for name, value in conditions.items():
+            column = self.columns[name]
+            if isinstance(column, StringColumn):
+                # Compare integer codes instead of strings
+                code = column.code_of(value)
+                if code is None:
+                    return []
+                codes = column.codes
+                indexes = [i for i in indexes if codes[i] == code]
+            else:
+                indexes = [i for i in indexes if column[i] == value]
+        return list(indexes)
+
+    def count_by(self, name):
+        """
+        :return: dictionary of column value to number of hosts, largest first
+        """
+        column = self.columns[name]
+        if isinstance(column, StringColumn):
+            counts = collections.Counter(column.codes)
+            return {column.values[code]: count for code, count in counts.most_common()}
+        return dict(collections.Counter(column).most_common())
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["host"] + list(self.columns))
+            for index in range(len(self.hosts)):
+                writer.writerow([self.hosts[index]] + [column[index] for column in self.columns.values()])
+
+    def save(self, path):
+        """
+        Write the store in a compact column oriented binary file: a JSON header (host names, column types and the
+        distinct values of the string columns) followed by the raw code and number arrays, one column after another.
+        """
+        header = {"hosts": self.hosts, "columns": []}
+        for name, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                header["columns"].append({"name": name, "type": "string", "values": column.values})
+            else:
+                header["columns"].append({"name": name, "type": "number"})
+        header_bytes = json.dumps(header).encode()
+
+        with open(path, "wb") as f:
+            f.write(_FILE_MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            for column in self.columns.values():
+                data = column.codes if isinstance(column, StringColumn) else column
+                data.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, "rb") as f:
+            if f.read(len(_FILE_MAGIC)) != _FILE_MAGIC:
+                raise ValueError(f"{path} is not a fact store file")
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+            store.hosts = header["hosts"]
+            store.host_index = {host: index for index, host in enumerate(store.hosts)}
+            for spec in header["columns"]:
+                if spec["type"] == "string":
+                    column = StringColumn()
+                    column.values = spec["values"]
+                    column._lookup = {value: code for code, value in enumerate(column.values)}
+                    column.codes.fromfile(f, len(store.hosts))
+                else:
+                    column = array.array("d")
+                    column.fromfile(f, len(store.hosts))
+                store.columns[spec["name"]] = column
+        return store
+
+    def to_parquet(self, path):
+        # pyarrow is not part of requirements.txt, it is only needed for this export
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet export requires the pyarrow module (pip install pyarrow)")
+
+        data = {"host": pyarrow.array(self.hosts)}
+        for name, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                data[name] = pyarrow.DictionaryArray.from_arrays(pyarrow.array(column.codes, pyarrow.uint32()),
+                                                                 pyarrow.array(column.values))
+            else:
+                data[name] = pyarrow.array(column, pyarrow.float64())
+        pyarrow.parquet.write_table(pyarrow.table(data), path)
+
+    def task_instance_completed(self, task, host, result):
+        if not result.failed:
+            self.add_collected(host.name, result.result)
@@ -0,0 +1,126 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: fake_napalm
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import random
+import time
+
+from nornir.core.connections import ConnectionPlugin, Connections
+
+
+class FakeAuthenticationError(Exception):
+    # Raised like netmiko's NetMikoAuthenticationException when the credentials are rejected
+    pass
+
+
+class FakeDriver(object):
+    """
+    Offline stand in for a NAPALM NetworkDriver.  Sleeps instead of talking to a device so benchmarks can run
+    without network access.
+    """
+
+    def __init__(self, hostname, connect_latency=0.0, getter_latency=0.0, fail=False, creds_valid=True):
+        self.hostname = hostname
+        self.connect_latency = connect_latency
+        self.getter_latency = getter_latency
+        self.fail = fail
+        self.creds_valid = creds_valid
+
+    def open(self):
+        time.sleep(self.connect_latency)
+        if self.fail:
+            raise ConnectionError(f"Fake connection to {self.hostname} failed")
+        if not self.creds_valid:
+            raise FakeAuthenticationError(f"Authentication to device {self.hostname} failed")
+
+    def close(self):
+        pass
+
+    def get_facts(self):
+        time.sleep(self.getter_latency)
+        # A few models and OS versions spread across the fleet
+        spread = sum(self.hostname.encode())
+        return {
+            "hostname": self.hostname,
+            "fqdn": f"{self.hostname}.example.net",
+            "vendor": "Cisco",
+            "model": ("FAKE-9000", "FAKE-9300", "FAKE-3850")[spread % 3],
+            "os_version": ("16.9.3", "17.3.4", "17.6.1", "16.12.4")[spread % 4],
+            "serial_number": f"FAKE{abs(hash(self.hostname)) % 10 ** 8:08d}",
+            "uptime": 86400,
+            "interface_list": ["GigabitEthernet1", "GigabitEthernet2"],
+        }
+
+    def cli(self, commands):
+        time.sleep(self.getter_latency)
+        return {command: f"{self.hostname}#{command}\nFake output for {command}" for command in commands}
+
+
+class FakeNapalm(ConnectionPlugin):
+    """
+    Nornir connection plugin which opens a FakeDriver.  The latency and failure profile is set at class level
+    by use_fake_napalm because Nornir instantiates connection plugins without arguments.
+    """
+
+    latencies = {}
+    default_latency = (0.0, 0.0)
+    jitter = 0.0
+    failure_rate = 0.0
+    valid_creds = None
+
+    def open(self, hostname, username, password, port, platform, extras=None, configuration=None):
+        connect_latency, getter_latency = self.latencies.get(hostname, self.default_latency)
+        if self.jitter:
+            connect_latency *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            getter_latency *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        connection = FakeDriver(hostname, connect_latency, getter_latency,
+                                fail=random.random() < self.failure_rate,
+                                creds_valid=self.valid_creds is None or (username, password) in self.valid_creds)
+        # Set before opening so closing a failed connection does not raise
+        self.connection = connection
+        connection.open()
+
+    def close(self):
+        self.connection.close()
+
+
+def use_fake_napalm(latencies=None, default_latency=(0.0, 0.0), failure_rate=0.0, jitter=0.0, valid_creds=None):
+    """
+    Replace the "napalm" connection plugin with FakeNapalm so napalm_get runs offline.
+    Must be called after InitNornir, which registers the real plugin.
+
+    :param latencies: Optional dictionary of hostname to (connect, getter) latency in seconds
+    :param default_latency: (connect, getter) latency in seconds for hosts not in latencies
+    :param failure_rate: Fraction of connections which fail
+    :param jitter: Each latency is scaled by a random factor between 1 - jitter and 1 + jitter
+    :param valid_creds: Optional collection of (username, password) pairs accepted by the fake devices, any other
+    pair fails authentication after the connect latency.  None accepts any credentials.
+    """
+    FakeNapalm.latencies = latencies or {}
+    FakeNapalm.default_latency = default_latency
+    FakeNapalm.jitter = jitter
+    FakeNapalm.failure_rate = failure_rate
+    FakeNapalm.valid_creds = set(valid_creds) if valid_creds is not None else None
+
+    if "napalm" in Connections.available:
+        Connections.deregister("napalm")
+    Connections.register("napalm", FakeNapalm)
+
+
+def restore_napalm():
+    # Put the real NAPALM connection plugin back, InitNornir refuses to start while FakeNapalm is registered
+    from nornir.plugins.connections.napalm import Napalm
+
+    if Connections.available.get("napalm") is FakeNapalm:
+        Connections.deregister("napalm")
+        Connections.register("napalm", Napalm)
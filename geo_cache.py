@@ -0,0 +1,136 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: geo_cache
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import collections
+import json
+import os
+import threading
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lng, precision=5):
+    """
+    Geohash of a point.  Each character halves the cell five times, alternating longitude and latitude, so points
+    sharing a geohash of a given length are in the same cell: about 5 km x 5 km for 5 characters, 1.2 km x 0.6 km
+    for 6 and 39 km x 20 km for 4.
+
+    :param lat: Latitude in decimal degrees (a number or the string returned by the open-notify API)
+    :param lng: Longitude in decimal degrees
+    :param precision: Number of geohash characters
+    """
+    lat, lng = float(lat), float(lng)
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            bounds[0] = middle
+        else:
+            bits = bits * 2
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+class GeocodeCache(object):
+    """
+    Persistent reverse geocode cache indexed by geohash cell.
+
+    Any point in a cell already looked up is answered from the cache, ocean results (no items) included, so
+    polling the ISS position does not spend an API call on every point a few kilometres from the last one.  The cache
+    is bounded, the least recently used cells are evicted first.
+
+    Usage:
+        cache = GeocodeCache(precision=5)
+        result = cache.get(lat, lng)
+        if result is None:
+            result = call_the_api(lat, lng)
+            cache.put(lat, lng, result)
+        cache.save()
+        cache.stats()
+
+    :param path: JSON file holding the cache
+    :param precision: Geohash length of a cell, see geohash
+    :param max_entries: Maximum number of cached cells
+    """
+
+    def __init__(self, path="geocode_cache.json", precision=5, max_entries=10000):
+        self.path = path
+        self.precision = precision
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if path and os.path.isfile(path):
+            with open(path) as f:
+                saved = json.load(f)
+            # Cells of a different precision do not match any key, start over
+            if saved.get("precision") == precision:
+                self.entries.update(saved["entries"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, lat, lng):
+        # Return the cached result for the cell of the point or None
+        key = geohash(lat, lng, self.precision)
+        with self._lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, lat, lng, result):
+        key = geohash(lat, lng, self.precision)
+        with self._lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def save(self):
+        # Least recently used first, the order is kept when the file is loaded again
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump({"precision": self.precision, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'HITS': self.hits, 'MISSES': self.misses, 'HIT_RATE': self.hits / lookups if lookups else 0.0,
+                'ENTRIES': len(self.entries), 'EVICTIONS': self.evictions}
+
+
+def print_stats(stats):
+
+    print(f"\n============= Reverse Geocode Cache =============")
+    print(f"Hits: {stats['HITS']}  Misses: {stats['MISSES']}  Hit rate: {stats['HIT_RATE']:.1%}")
+    print(f"Cached cells: {stats['ENTRIES']}  Evicted: {stats['EVICTIONS']}")
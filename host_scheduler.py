@@ -0,0 +1,184 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: host_scheduler
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import json
+import os
+import time
+
+from nornir.core import Nornir
+from nornir.core.inventory import Hosts, Inventory
+from nornir.core.task import Result
+
+import batch_collect
+
+
+class RunHistory(object):
+    """
+    Per host connect and getter durations from earlier runs plus the worker count used, saved as a JSON file.
+    Durations are smoothed with an exponentially weighted moving average so one slow run does not dominate.
+    """
+
+    def __init__(self, path="run_history.json", alpha=0.5):
+        self.path = path
+        self.alpha = alpha
+        self.hosts = {}
+        self.runs = []
+        if os.path.isfile(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.hosts = saved.get("hosts", {})
+            self.runs = saved.get("runs", [])
+
+    def estimate(self, name, default=None):
+        # Expected total duration for a host, unknown hosts get the default
+        entry = self.hosts.get(name)
+        if entry is None:
+            return default
+        return entry["connect"] + entry["getter"]
+
+    def record(self, timings, num_workers, makespan, configured=None):
+        """
+        :param timings: dictionary of host name to {"connect": s, "getter": s, "failed": bool}
+        :param num_workers: worker count used for the run
+        :param makespan: wall clock time of the whole run in seconds
+        :param configured: worker count of the Nornir configuration at the time of the run
+        """
+        for name, timing in timings.items():
+            entry = self.hosts.get(name)
+            if entry is None:
+                self.hosts[name] = {"connect": timing["connect"], "getter": timing["getter"], "failures": 0}
+                entry = self.hosts[name]
+            else:
+                for key in ("connect", "getter"):
+                    entry[key] = self.alpha * timing[key] + (1 - self.alpha) * entry[key]
+            entry["failures"] = entry["failures"] + 1 if timing["failed"] else 0
+
+        failed = sum(1 for timing in timings.values() if timing["failed"])
+        self.runs.append({"num_workers": num_workers,
+                          "configured": configured,
+                          "hosts": len(timings),
+                          "throughput": len(timings) / makespan if makespan else 0.0,
+                          "failure_rate": failed / len(timings) if timings else 0.0})
+        # Only the last few runs matter when adjusting the worker count
+        self.runs = self.runs[-10:]
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"hosts": self.hosts, "runs": self.runs}, f, indent=2)
+
+
+def timed_napalm_get(task, getters, timings, commands=None):
+    """
+    napalm getter (and optional CLI command) collection which records the connect and getter durations of each host
+    in the timings dictionary
+    """
+    start = time.perf_counter()
+    connect = getter = 0.0
+    failed = True
+    try:
+        task.host.get_connection("napalm", task.nornir.config)
+        connect = time.perf_counter() - start
+        # collect_batch reuses the connection opened above
+        result = batch_collect.collect_batch(task, getters=getters, commands=commands)
+        getter = time.perf_counter() - start - connect
+        failed = result.failed
+    finally:
+        if failed:
+            connect = time.perf_counter() - start
+        timings[task.host.name] = {"connect": connect, "getter": getter, "failed": failed}
+
+    return Result(host=task.host, result=result.result, failed=result.failed, errors=result.errors)
+
+
+def order_by_history(nr, history):
+    """
+    Return a copy of the Nornir object with the historically slowest hosts first (longest processing time first)
+    so they do not start last and set the total runtime.  Hosts without history are given the average duration.
+    """
+    known = [history.estimate(name) for name in nr.inventory.hosts if name in history.hosts]
+    average = sum(known) / len(known) if known else 0.0
+
+    ordered = sorted(nr.inventory.hosts.items(), key=lambda item: -history.estimate(item[0], average))
+    inventory = Inventory(hosts=Hosts(ordered), groups=nr.inventory.groups, defaults=nr.inventory.defaults)
+
+    return Nornir(inventory=inventory, config=nr.config, data=nr.data, processors=nr.processors)
+
+
+def pick_num_workers(history, configured, num_hosts, max_workers=None, max_failure_rate=0.1, step=0.25):
+    """
+    Adjust the worker count from the last runs, starting from the configured count.
+
+    The count is cut in half when the failure rate suggests devices or the network are overloaded.  Otherwise it is
+    raised by step after the first run and whenever the last run had a better throughput than the one before, and
+    lowered by step when the throughput fell, so it settles around the best count instead of growing every run.
+    It never goes over max_workers or the number of hosts.  When the configured count changes, the history of
+    worker counts is ignored and the next run starts again from the configured count.
+
+    :param configured: worker count of the Nornir configuration
+    :param max_workers: highest worker count, 4 times the configured count by default
+    :return: number of workers for the next run
+    """
+    if max_workers is None:
+        max_workers = 4 * configured
+    runs = [run for run in history.runs if run.get("configured", configured) == configured]
+
+    if not runs:
+        num_workers = configured
+    else:
+        last = runs[-1]
+        num_workers = last["num_workers"]
+        if last["failure_rate"] > max_failure_rate:
+            num_workers = num_workers // 2
+        elif len(runs) < 2 or last["throughput"] > runs[-2]["throughput"]:
+            num_workers = int(num_workers * (1 + step)) + 1
+        elif last["throughput"] < runs[-2]["throughput"]:
+            num_workers = int(num_workers / (1 + step))
+
+    return max(1, min(num_workers, max_workers, num_hosts))
+
+
+def scheduled_run(nr, getters, commands=None, history_file="run_history.json", verbose=True, timings=None,
+                  max_workers=None):
+    """
+    Run napalm getters (and optional CLI commands) with the slowest hosts first and an adaptive worker count,
+    then update the run history.
+
+    :param timings: Optional dictionary to receive the per host timings of this run
+    :param max_workers: Highest worker count, see pick_num_workers
+    :return: AggregatedResult of the run
+    """
+    history = RunHistory(history_file)
+    ordered_nr = order_by_history(nr, history)
+    configured = nr.config.core.num_workers
+    num_workers = pick_num_workers(history, configured, len(nr.inventory.hosts), max_workers=max_workers)
+
+    if verbose:
+        print(f"Scheduling {len(nr.inventory.hosts)} hosts slowest first with {num_workers} workers "
+              f"({len(history.hosts)} hosts with history in {history_file})")
+
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    result = ordered_nr.run(timed_napalm_get, num_workers=num_workers, getters=getters, timings=timings,
+                            commands=commands)
+    makespan = time.perf_counter() - start
+
+    if timings:
+        # A run without hosts (all served from the fact cache) says nothing about the worker count
+        history.record(timings, num_workers, makespan, configured=configured)
+        history.save()
+
+    if verbose:
+        print(f"Run completed in {makespan:.2f} seconds, {len(result.failed_hosts)} hosts failed")
+
+    return result
@@ -0,0 +1,103 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: inventory_cache
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import hashlib
+import os
+import pickle
+import sys
+from typing import ClassVar, Optional
+
+import nornir
+from nornir.core.inventory import Inventory
+from nornir.plugins.inventory.simple import SimpleInventory
+
+# Bump when the layout of the cache file changes so old snapshots are rebuilt
+CACHE_FORMAT = b"1"
+
+
+def inventory_hash(*paths):
+    """
+    :return: sha256 hex digest of the content of the inventory files.  Missing files hash as empty.  The nornir
+    and Python versions are part of the digest, the pickled Inventory is only loaded by the versions that wrote it.
+    """
+    digest = hashlib.sha256(CACHE_FORMAT)
+    digest.update(f"{nornir.__version__}\0{sys.version}\0".encode())
+    for path in paths:
+        digest.update(path.encode() + b"\0")
+        if path and os.path.isfile(os.path.expanduser(path)):
+            with open(os.path.expanduser(path), "rb") as f:
+                digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_snapshot(cache_file, key):
+    # The key is stored on the first line so a stale snapshot is detected without unpickling it
+    if not os.path.isfile(cache_file):
+        return None
+    with open(cache_file, "rb") as f:
+        if f.readline().strip() != key.encode():
+            return None
+        try:
+            return pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+
+def save_snapshot(cache_file, key, snapshot):
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(key.encode() + b"\n")
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Replace in one step so a concurrent run never reads a half written snapshot
+    os.replace(tmp_file, cache_file)
+
+
+class CachedInventory(SimpleInventory):
+    """
+    SimpleInventory with a compiled binary snapshot of the parsed hosts, groups and defaults.
+
+    The snapshot is keyed by the content hash of the inventory files.  When nothing has changed it is loaded
+    instead of parsing the YAML, when anything has changed the YAML is parsed and the snapshot rebuilt.
+
+    Use it by setting the inventory plugin in config.yaml or when initializing Nornir:
+        InitNornir(config_file='config.yaml', inventory={"plugin": "inventory_cache.CachedInventory"})
+
+    Options (in addition to the SimpleInventory ones):
+        cache_file: path of the snapshot, defaults to .inventory_cache.pickle
+    """
+
+    # "yaml" or "cache", how the last inventory was loaded
+    last_load: ClassVar[Optional[str]] = None
+
+    @classmethod
+    def deserialize(cls, transform_function=None, transform_function_options=None, host_file="hosts.yaml",
+                    group_file="groups.yaml", defaults_file="defaults.yaml", cache_file=".inventory_cache.pickle",
+                    *args, **kwargs):
+        key = inventory_hash(host_file, group_file, defaults_file)
+        snapshot = load_snapshot(cache_file, key)
+
+        if snapshot is None:
+            inv = super().deserialize(host_file=host_file, group_file=group_file, defaults_file=defaults_file,
+                                      *args, **kwargs)
+            snapshot = (inv.hosts, inv.groups, inv.defaults)
+            save_snapshot(cache_file, key, snapshot)
+            cls.last_load = "yaml"
+        else:
+            cls.last_load = "cache"
+
+        hosts, groups, defaults = snapshot
+        # The transform function is applied on every load, the snapshot holds the untransformed inventory
+        return Inventory(hosts=hosts, groups=groups, defaults=defaults, transform_function=transform_function,
+                         transform_function_options=transform_function_options or {})
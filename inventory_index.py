@@ -0,0 +1,148 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: inventory_index
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import bisect
+import fnmatch
+import re
+import time
+
+# First wildcard character of a name pattern, everything before it is a literal prefix
+_WILDCARD = re.compile(r"[*?\[]")
+
+
+class InventoryIndex(object):
+    """
+    Host indexes of a Nornir inventory by group (parent groups included), platform and name, built in one pass
+    right after the inventory is loaded.
+
+    A selection only touches the index entries it asks for: groups and platforms are dictionary lookups and a name
+    pattern with a literal prefix ("ios-xe-*") is a range of the sorted host names.  Only patterns starting with a
+    wildcard ("*-mgmt") go through every name.  filter then builds a Nornir object over the selected hosts without
+    the per host filter function of nr.filter, so the cost of a partial run follows the size of the selection and
+    not of the inventory.
+
+    Building the index goes through every host once and costs several nr.filter passes, so it only pays off when
+    the same inventory is selected from many times (the collector daemon).  A single selection uses filter_hosts.
+
+    Usage:
+        index = InventoryIndex(nr.inventory)
+        nr = index.filter(nr, groups=["devnet_sandbox_nxos"], names=["sbx-*"])
+
+    :param inventory: Nornir inventory
+    """
+
+    def __init__(self, inventory):
+        start = time.perf_counter()
+        self.inventory = inventory
+        self.by_group = {}
+        self.by_platform = {}
+        self.positions = {}
+
+        ancestors = {}
+
+        def group_names(group):
+            # The group and all its parent groups, resolved once per group
+            if group.name not in ancestors:
+                names = [group.name]
+                for parent in group.groups.refs:
+                    names.extend(name for name in group_names(parent) if name not in names)
+                ancestors[group.name] = names
+            return ancestors[group.name]
+
+        for position, (name, host) in enumerate(inventory.hosts.items()):
+            self.positions[name] = position
+            members = set()
+            for group in host.groups.refs:
+                members.update(group_names(group))
+            for group_name in members:
+                self.by_group.setdefault(group_name, []).append(name)
+            self.by_platform.setdefault(host.platform, []).append(name)
+
+        self.names = sorted(self.positions)
+        self.elapsed = time.perf_counter() - start
+
+    def match_names(self, pattern):
+        # Host names matching a glob pattern (fnmatch syntax, case sensitive)
+        prefix = _WILDCARD.split(pattern, 1)[0]
+        if prefix == pattern:
+            return [pattern] if pattern in self.positions else []
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + "\U0010ffff", start) if prefix else len(self.names)
+        if pattern == prefix + "*":
+            return self.names[start:end]
+        return [name for name in self.names[start:end] if fnmatch.fnmatchcase(name, pattern)]
+
+    def select(self, groups=(), platforms=(), names=()):
+        """
+        Host names selected by group, platform and name.  Values of one criterion are combined with OR and the
+        criteria with AND, so groups=["a", "b"], platforms=["ios"] selects the ios hosts of group a or b.
+
+        :param groups: Group names, a host is in a group when any of its groups or their parents has that name
+        :param platforms: Platform names
+        :param names: Host names or glob patterns
+        :return: list of host names in inventory order, all the hosts when no criterion is given
+        """
+        selected = None
+        for matches in ([self.by_group.get(group, []) for group in groups],
+                        [self.by_platform.get(platform, []) for platform in platforms],
+                        [self.match_names(pattern) for pattern in names]):
+            if not matches:
+                continue
+            hosts = set().union(*matches)
+            selected = hosts if selected is None else selected & hosts
+
+        if selected is None:
+            return list(self.positions)
+        return sorted(selected, key=self.positions.__getitem__)
+
+    def filter(self, nr, groups=(), platforms=(), names=()):
+        """
+        Nornir object over the selected hosts only, sharing the configuration, groups, defaults and connections of
+        nr.  Without any criterion nr itself is returned.
+
+        :return: Nornir object
+        """
+        from nornir.core import Nornir
+        from nornir.core.inventory import Inventory
+
+        if not (groups or platforms or names):
+            return nr
+        hosts = self.inventory.hosts
+        selected = Nornir(**nr.__dict__)
+        selected.inventory = Inventory(hosts={name: hosts[name] for name in self.select(groups, platforms, names)},
+                                       groups=self.inventory.groups, defaults=self.inventory.defaults)
+        return selected
+
+
+def filter_hosts(nr, groups=(), platforms=(), names=()):
+    """
+    One shot selection with nr.filter and the same rules as InventoryIndex.select, for a run which only selects
+    once and would spend more time building the index than it saves.
+
+    :return: Nornir object over the selected hosts, nr itself without any criterion
+    """
+    if not (groups or platforms or names):
+        return nr
+
+    # Groups are few, resolve once which of them are or descend from a requested group
+    members = {name for name, group in nr.inventory.groups.items()
+               if name in groups or any(group.has_parent_group(parent) for parent in groups)}
+
+    def selected(host):
+        # Cheapest test first, the platform is resolved through the groups and the defaults
+        return ((not groups or any(group.name in members for group in host.groups.refs)) and
+                (not names or any(fnmatch.fnmatchcase(host.name, pattern) for pattern in names)) and
+                (not platforms or host.platform in platforms))
+
+    return nr.filter(filter_func=selected)
@@ -0,0 +1,202 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: iss_track
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import concurrent.futures
+import functools
+import json
+import random
+import threading
+import time
+
+import env_apikeys
+import geo_cache
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket rate limiter.  acquire blocks until a token is available, so the callers together never
+    go over rate calls per second, after an initial burst of at most capacity calls.
+
+    :param rate: Tokens added per second, the provider quota
+    :param capacity: Maximum number of tokens kept, 1 spaces the calls evenly
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def poll_positions(count, interval=1.0, base_url=env_apikeys.ISS_API):
+    """
+    Generator of ISS positions sampled from the open-notify API.
+
+    :param count: Number of positions
+    :param interval: Seconds between two samples
+    :return: (latitude, longitude) tuples as they are sampled
+    """
+    for i in range(count):
+        if i:
+            time.sleep(interval)
+        yield env_apikeys.get_iss_location(base_url=base_url)
+
+
+def read_positions(path):
+    # Positions from a JSON Lines file with "latitude" and "longitude" keys, like the output of geocode_track
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                position = json.loads(line)
+                yield position["latitude"], position["longitude"]
+
+
+def _geocode(lat, lng, api_key, bucket, cache, base_url, max_retries, backoff, stats, lock):
+    # One reverse geocode with retries.  429 and 5xx responses and connection errors are retried after an exponential
+    # backoff with full jitter, so throttled workers do not all come back at the same time.
+    import requests
+
+    # A cache hit does not use the quota, so the cache is checked here, once, before taking a token.  The calls
+    # below then skip the cache, another lookup there would count every miss twice in the cache statistics.
+    if cache is not None:
+        resp_json = cache.get(lat, lng)
+        if resp_json is not None:
+            return 200, resp_json, True, 1
+
+    for attempt in range(max_retries + 1):
+        if attempt:
+            with lock:
+                stats['RETRIES'] += 1
+            time.sleep(random.uniform(0, min(backoff * 2 ** attempt, 10.0)))
+        bucket.acquire()
+        try:
+            status_code, resp_json, cached = env_apikeys.reverse_geocode(lat, lng, api_key, base_url=base_url)
+        except requests.exceptions.RequestException as e:
+            status_code, resp_json, cached = None, {"error": str(e)}, False
+        except ValueError as e:
+            # A successful response which is not JSON is a failed lookup, retrying would get the same body
+            with lock:
+                stats['REQUESTS'] += 1
+            return None, {"error": f"Invalid JSON response: {e}"}, False, attempt + 1
+        with lock:
+            stats['REQUESTS'] += 1
+            if status_code == 429:
+                stats['THROTTLED'] += 1
+        if status_code is not None and status_code != 429 and status_code < 500:
+            break
+    if status_code == 200 and cache is not None:
+        # Trimmed to the first item like reverse_geocode does
+        cache.put(lat, lng, {"items": resp_json.get("items", [])[:1]})
+    return status_code, resp_json, cached, attempt + 1
+
+
+def geocode_track(positions, api_key, output, rate=5.0, capacity=1, workers=8, precision=5, cache=None,
+                  base_url=env_apikeys.HERE_REVGEOCODE, max_retries=5, backoff=0.2):
+    """
+    Reverse geocode a stream of ISS positions concurrently while staying under the provider quota.
+
+    Positions are read as they arrive and only the first position of each geohash cell of the given precision is
+    geocoded, the others are counted as duplicates.  At most twice the number of workers lookups are in flight, so a
+    generator of positions (see poll_positions) is consumed as it produces.  Every API call takes a token from a
+    TokenBucket of rate calls per second, and each result is written to the output JSON Lines file by a done
+    callback as soon as the lookup completes, without waiting for the next position.
+
+    :param positions: iterable of (latitude, longitude)
+    :param api_key: HERE API key
+    :param output: JSON Lines file the results are written to
+    :param rate: Provider quota in calls per second
+    :param capacity: Token bucket size, the largest burst of calls
+    :param workers: Number of concurrent lookups
+    :param precision: Geohash length of the deduplication cell
+    :param cache: optional geo_cache.GeocodeCache
+    :param max_retries: Retries of a 429, 5xx or failed call before it is written as failed
+    :param backoff: Base of the exponential backoff in seconds
+    :return: dictionary of statistics
+    """
+    stats = {'POSITIONS': 0, 'DUPLICATES': 0, 'GEOCODED': 0, 'CACHED': 0, 'FAILED': 0, 'REQUESTS': 0,
+             'THROTTLED': 0, 'RETRIES': 0}
+    lock = threading.Lock()
+    bucket = TokenBucket(rate, capacity)
+    # Bounds the lookups in flight, a slot is given back when the result is written
+    slots = threading.BoundedSemaphore(2 * workers)
+    seen = set()
+    start = time.perf_counter()
+
+    def write(lat, lng, cell, future):
+        # Done callback, runs in the worker thread as soon as the lookup completes
+        try:
+            try:
+                status_code, resp_json, cached, attempts = future.result()
+                items = resp_json.get("items", []) if status_code == 200 else []
+            except Exception as e:
+                status_code, resp_json, cached, attempts, items = None, {"error": str(e)}, False, 0, []
+            record = {"latitude": lat, "longitude": lng, "geohash": cell, "status": status_code,
+                      "attempts": attempts, "cached": cached,
+                      "country": items[0]["address"].get("countryName") if items else None,
+                      "label": items[0]["address"].get("label") if items else None,
+                      "water": status_code == 200 and not items}
+            if status_code != 200:
+                record["error"] = resp_json.get("error")
+            with lock:
+                sink.write(json.dumps(record) + "\n")
+                sink.flush()
+                if status_code != 200:
+                    stats['FAILED'] += 1
+                elif cached:
+                    stats['CACHED'] += 1
+                else:
+                    stats['GEOCODED'] += 1
+        finally:
+            slots.release()
+
+    with open(output, "w") as sink, concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for lat, lng in positions:
+            stats['POSITIONS'] += 1
+            cell = geo_cache.geohash(lat, lng, precision)
+            if cell in seen:
+                stats['DUPLICATES'] += 1
+                continue
+            seen.add(cell)
+
+            slots.acquire()
+            future = pool.submit(_geocode, lat, lng, api_key, bucket, cache, base_url, max_retries, backoff,
+                                 stats, lock)
+            future.add_done_callback(functools.partial(write, lat, lng, cell))
+        # Leaving the executor waits for the lookups still in flight and their callbacks
+
+    stats['ELAPSED'] = time.perf_counter() - start
+    return stats
+
+
+def print_stats(stats, output):
+
+    lookups = stats['GEOCODED'] + stats['CACHED'] + stats['FAILED']
+    print(f"\n============= ISS Ground Track written to {output} =============")
+    print(f"Positions: {stats['POSITIONS']}  Duplicates: {stats['DUPLICATES']}  Geocoded: {stats['GEOCODED']}  "
+          f"Cached: {stats['CACHED']}  Failed: {stats['FAILED']}")
+    print(f"API calls: {stats['REQUESTS']}  Throttled (429): {stats['THROTTLED']}  Retries: {stats['RETRIES']}")
+    print(f"{lookups} lookups in {stats['ELAPSED']:.1f} s ({lookups / stats['ELAPSED']:.1f}/s)")
@@ -27,6 +27,8 @@ import add_2env
 
 def load_env_from_dotenv_file(path):
     # Load the key/value pairs in the .env file as environment variables
+    # Long running scripts which reload the .env file often can use dotenv_loader.DotenvLoader, which only applies
+    # what changed since the last load
     if os.path.isfile(path):
         dotenv.load_dotenv(path)
     else:
@@ -56,18 +58,17 @@ def main():
     list_of_vars = ['API_KEY', 'MY_ENV', 'MY_REPO', 'CONTEXT', 'NETUSER', 'NETPASS', 'MY_BOOL', 'MY_INT', "NOT_THERE"]
 
     # Look for each of the variables in the list_of_vars list to confirm that they have been set in memory as
-    # environment variables
+    # environment variables.  check_envs checks the whole list against one snapshot of the environment.
     print(f"\n======= Confirm variables loaded from .env file are valid environment variables: ")
-    for var in list_of_vars:
+    for var_check in add_2env.check_envs(list_of_vars):
 
-        var_dict = add_2env.check_env(var)
-        if var_dict['VALID']:
-            print(f"\tEnvironment Variable {var_dict['NAME']} is valid!")
+        if var_check.VALID:
+            print(f"\tEnvironment Variable {var_check.NAME} is valid!")
         else:
-            if var_dict['EXISTS']:
-                print(f"\tEnvironment Variable {var_dict['NAME']} is NOT valid and may exists but is empty!")
+            if var_check.EXISTS:
+                print(f"\tEnvironment Variable {var_check.NAME} is NOT valid and may exists but is empty!")
             else:
-                print(f"\tEnvironment Variable {var_dict['NAME']} does not exist!")
+                print(f"\tEnvironment Variable {var_check.NAME} does not exist!")
 
 
 # Standard call to the main() function.
@@ -20,6 +20,56 @@ import decouple
 
 import add_2env
 
+# Cast for comma separated values, use as config('MY_LIST', cast=CSV)
+CSV = decouple.Csv(post_process=tuple)
+
+
+class ConfigSnapshot(object):
+    """
+    Typed snapshot of the settings in a .env file.
+
+    decouple.config looks the key up in os.environ and in the .env file and casts the value again on every call.
+    The snapshot reads the .env file once and memoises the raw string of each key, so repeated reads are one
+    dictionary lookup and the cast.  Values are fixed at the first read of each key, later changes to os.environ or
+    the file are not seen.
+
+    Usage:
+        config = ConfigSnapshot('.env')
+        config('MY_BOOL', default=False, cast=bool)
+        config('MY_INT', default=0, cast=int)
+        config('MY_LIST', default='', cast=CSV)
+
+    :param path: .env file to load
+    """
+
+    def __init__(self, path='.env'):
+        self.path = path
+        self._config = decouple.Config(decouple.RepositoryEnv(path))
+        self._raw = {}
+
+    def __call__(self, option, default=decouple.undefined, cast=decouple.undefined):
+        # Same arguments and precedence (os.environ first, then the .env file) as decouple.config
+        try:
+            value = self._raw[option]
+        except KeyError:
+            # Defaults are not memoised, a different default may be passed for a missing key
+            if option not in os.environ and option not in self._config.repository:
+                return self._config(option, default=default, cast=cast)
+            value = self._raw[option] = self._config(option)
+
+        # The cast is applied on every read, the same key may be read with different casts
+        if isinstance(cast, decouple.Undefined):
+            return value
+        if cast is bool:
+            cast = self._config._cast_boolean
+        return cast(value)
+
+    def __getitem__(self, option):
+        return self(option)
+
+    def __contains__(self, option):
+        return option in self._config.repository
+
 
 def check_dotenv_file(path):
     # Check to make sure the .env file is valid
@@ -33,7 +83,11 @@ def check_dotenv_file(path):
 
 def main():
 
-    valid_env_file = check_dotenv_file(os.path.join(os.getcwd(), '.env'))
+    dotenv_path = os.path.join(os.getcwd(), '.env')
+    valid_env_file = check_dotenv_file(dotenv_path)
+
+    # The .env file is read once and each value is looked up once
+    config = ConfigSnapshot(dotenv_path)
 
     # Verify that the environment variables in our .env file are set
     # Using the variables in the .env_example file - Remember to update as needed
@@ -41,24 +95,32 @@ def main():
 
     print(f"\n======= View Variables loaded from .env file: ")
     for var in list_of_vars:
-        print(f".env file variable name: {var} with value: {decouple.config(var)} of type {type(decouple.config(var))}")
+        value = config(var)
+        print(f".env file variable name: {var} with value: {value} of type {type(value)}")
 
-    env_bool_value = decouple.config('MY_BOOL', default=False, cast=bool)
+    env_bool_value = config('MY_BOOL', default=False, cast=bool)
     print(f"\nBoolean Value with default and cast set:  variable MY_BOOL "
           f"with value: {env_bool_value} "
           f"of type {type(env_bool_value)}")
 
-    env_int_value = decouple.config('MY_INT', default=0, cast=int)
+    env_int_value = config('MY_INT', default=0, cast=int)
     print(f"\nInteger Value with default and cast set:  variable MY_INT"
           f" with value: {env_int_value} "
           f"of type {type(env_int_value)}\n")
 
     # Confirm that while values were loaded from the .env file they were not set as environment variables
-    test_check_dict = add_2env.check_env('TEST')
-    print(f"\nChecking for environment variable: {test_check_dict['NAME']}:")
-    print(f"\tExists: {test_check_dict['EXISTS']}")
-    print(f"\tValid: {test_check_dict['VALID']}")
-    print(f"\tValue: {test_check_dict['VALUE']}")
+    # check_envs checks all the .env file variables against one snapshot of the environment
+    env_checks = add_2env.check_envs(list_of_vars)
+    test_check = env_checks[list_of_vars.index('TEST')]
+    print(f"\nChecking for environment variable: {test_check.NAME}:")
+    print(f"\tExists: {test_check.EXISTS}")
+    print(f"\tValid: {test_check.VALID}")
+    print(f"\tValue: {test_check.VALUE}")
+
+    env_summary = add_2env.summarize_envs(env_checks)
+    print(f"\n.env file variables set as environment variables: {', '.join(env_summary['VALID']) or 'None'}")
+    print(f".env file variables set as EMPTY environment variables: {', '.join(env_summary['EMPTY']) or 'None'}")
+    print(f".env file variables NOT set as environment variables: {', '.join(env_summary['MISSING']) or 'None'}")
 
 
 # Standard call to the main() function.
@@ -0,0 +1,115 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: parse_pool
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import concurrent.futures
+import io
+import multiprocessing
+import os
+
+import textfsm
+
+import base_processor
+
+# Compiled TextFSM templates, one cache per parser process
+_fsm_cache = {}
+
+
+def parse_output(host, command, template, output):
+    """
+    Parse raw CLI output with a TextFSM template.  Runs in the parser processes.
+
+    :return: (host, command, list of dictionaries keyed by the template Values)
+    """
+    fsm = _fsm_cache.get(template)
+    if fsm is None:
+        with open(template) as f:
+            fsm = textfsm.TextFSM(io.StringIO(f.read()))
+        _fsm_cache[template] = fsm
+    fsm.Reset()
+    rows = fsm.ParseText(output)
+    return host, command, [dict(zip(fsm.header, row)) for row in rows]
+
+
+def _ready(_):
+    # Does nothing, submitted by ParsePipeline.start to get the parser processes running
+    return None
+
+
+class ParsePipeline(base_processor.BaseProcessor):
+    """
+    CLI output parsing stage running in a process pool.
+
+    The Nornir worker threads only collect raw output (see batch_collect.collect_batch), so the CPU bound TextFSM
+    parsing never holds the GIL of the process talking to the devices.  As a Nornir processor, each host's output is
+    handed to the pool as soon as that host completes and records() yields the structured records as they are parsed.
+
+    Usage:
+        with ParsePipeline({"show ip interface brief": "templates/show_ip_int_brief.textfsm"}) as pipeline:
+            nr.with_processors([pipeline]).run(collect_batch, commands=["show ip interface brief"])
+            for host, command, rows in pipeline.records():
+                ...
+
+    A host whose output cannot be parsed (missing template, TextFSMError) does not stop the others, its error is
+    kept in errors as (host, command, error) and records() goes on with the next host.
+
+    :param templates: dictionary of CLI command to TextFSM template file
+    :param max_workers: number of parser processes, defaults to the number of CPUs
+    """
+
+    def __init__(self, templates, max_workers=None):
+        self.templates = templates
+        # The parser processes are started on the first submit, from a Nornir worker thread.  Forking a process
+        # which already runs threads can copy locks held by another thread, so they are started from a clean
+        # forkserver process instead (spawn where forkserver is not available, Windows)
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers,
+                                                            mp_context=multiprocessing.get_context(start_method))
+        self._futures = {}
+        self.errors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def start(self):
+        # Start the parser processes now instead of on the first host, so their startup is not part of the run
+        list(self._pool.map(_ready, range(self.max_workers)))
+
+    def submit(self, host, command, output):
+        future = self._pool.submit(parse_output, host, command, self.templates[command], output)
+        self._futures[future] = (host, command)
+
+    def records(self):
+        # Yield (host, command, rows) in completion order, each record is handed out once
+        futures, self._futures = self._futures, {}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                host, command = futures[future]
+                self.errors.append((host, command, f"{type(e).__name__}: {e}"))
+
+    def task_instance_completed(self, task, host, result):
+        if result.failed or not isinstance(result.result, dict):
+            return
+        for command in self.templates:
+            output = result.result.get(command)
+            if output:
+                self.submit(host.name, command, output)
@@ -0,0 +1,100 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: result_sink
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import json
+import threading
+
+import base_processor
+
+
+class JsonLinesSink(base_processor.BaseProcessor):
+    """
+    Nornir processor which writes each host's result as one JSON Lines record as soon as that host completes,
+    instead of waiting for the whole AggregatedResult.
+
+    Usage:
+        with JsonLinesSink("facts.jsonl", drop_results=True) as sink:
+            result = nr.with_processors([sink]).run(napalm_get, getters=['get_facts'])
+
+    :param path: File to write the records to, or an already open file like object (a socket makefile for example)
+    :param drop_results: When True the per host results are released once written.  Nornir still keeps one
+    MultiResult per host in the AggregatedResult, it is cut down to a single Result holding only the failed/changed
+    flags and the exception, so memory grows by that fixed entry per host (about 600 bytes) and not by the size
+    of the host's data, subtask results or output.
+    """
+
+    def __init__(self, path, drop_results=False):
+        self.path = path
+        self.drop_results = drop_results
+        self.written = 0
+        self.failed = 0
+        # Hosts complete in the worker threads, one record must not interleave with another
+        self._lock = threading.Lock()
+        if hasattr(path, "write"):
+            self._file = path
+            self._owns_file = False
+            self.path = getattr(path, "name", "<stream>")
+        else:
+            self._file = open(path, "w")
+            self._owns_file = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def task_completed(self, task, result):
+        self._file.flush()
+
+    def task_instance_completed(self, task, host, result):
+        record = {
+            "host": host.name,
+            "task": task.name,
+            "failed": result.failed,
+            "result": result.result,
+            "exception": str(result.exception) if result.exception else None,
+        }
+        line = json.dumps(record, default=str)
+
+        with self._lock:
+            self._file.write(line + "\n")
+            if not self._owns_file:
+                # Readers on the other end of a stream see each host as soon as it completes
+                self._file.flush()
+            self.written += 1
+            if result.failed:
+                self.failed += 1
+
+        if self.drop_results:
+            self._drop(result)
+
+    @staticmethod
+    def _drop(result):
+        # Nornir reads the host of the first Result once the processors are done, so that one Result is kept for the
+        # summary flags of the MultiResult and everything else is released
+        summary = result[0]
+        summary.failed = result.failed
+        summary.changed = result.changed
+        summary.exception = next((r.exception for r in result if r.exception), None)
+        summary.result = None
+        summary.stdout = summary.stderr = None
+        summary.diff = ""
+        del result[1:]
@@ -0,0 +1,171 @@
+#!/usr/bin/python -tt
+# Project: creds_in_env
+# Filename: run_metrics
+# claudia
+# PyCharm
+
+from __future__ import absolute_import, division, print_function
+
+__author__ = "Claudia de Luna (claudia@indigowire.net)"
+__version__ = ": 1.0 $"
+__date__ = "10/18/26"
+__copyright__ = "Copyright (c) 2026 Claudia"
+__license__ = "Python"
+
+import contextlib
+import json
+import time
+
+# Upper bounds in seconds of the per host latency histogram buckets (Prometheus "le" buckets)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        # (le, cumulative count) pairs as Prometheus expects them, ending with +Inf
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+    def dict(self):
+        return {"buckets": {str(bound): count for bound, count in self.cumulative()},
+                "sum": self.sum, "count": self.count}
+
+
+class RunMetrics(object):
+    """
+    Wall clock and CPU time per phase of an env_creds run, per host connect and getter latency histograms and
+    the failure count.
+
+    Usage:
+        metrics = RunMetrics(profile_phases=("credentials", "results"))
+        with metrics.phase("init_nornir"):
+            nr = InitNornir(config_file='config.yaml')
+        ...
+        metrics.observe_hosts(timings)
+        metrics.write("env_creds_metrics")
+
+    :param profile_phases: Phases to capture with cProfile and tracemalloc.  Profiling slows those phases down.
+    """
+
+    def __init__(self, profile_phases=()):
+        self.phases = {}
+        self.connect = Histogram()
+        self.getter = Histogram()
+        self.failures = 0
+        self.hosts = 0
+        self.profile_phases = set(profile_phases)
+        self.profiles = {}
+        self.allocations = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        profiler = None
+        if name in self.profile_phases:
+            # Only loaded for profiled runs, env_creds imports this module on every start
+            import cProfile
+            import tracemalloc
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            entry = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            entry["wall"] += wall
+            entry["cpu"] += cpu
+
+            if profiler:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.profiles[name] = profiler
+                self.allocations[name] = {
+                    "peak_bytes": peak,
+                    "top": [str(stat) for stat in snapshot.statistics("lineno")[:10]],
+                }
+
+    def observe_hosts(self, timings):
+        """
+        :param timings: dictionary of host name to {"connect": s, "getter": s, "failed": bool} as filled in by
+        host_scheduler.timed_napalm_get
+        """
+        for timing in timings.values():
+            self.hosts += 1
+            self.connect.observe(timing["connect"])
+            if timing["failed"]:
+                self.failures += 1
+            else:
+                self.getter.observe(timing["getter"])
+
+    def dict(self):
+        return {
+            "phases": self.phases,
+            "hosts": self.hosts,
+            "failures": self.failures,
+            "connect_seconds": self.connect.dict(),
+            "getter_seconds": self.getter.dict(),
+            "allocations": self.allocations,
+        }
+
+    def prometheus(self):
+        lines = ["# HELP env_creds_phase_wall_seconds Wall clock time of each run phase",
+                 "# TYPE env_creds_phase_wall_seconds gauge"]
+        lines += [f'env_creds_phase_wall_seconds{{phase="{name}"}} {entry["wall"]:.6f}'
+                  for name, entry in self.phases.items()]
+        lines += ["# HELP env_creds_phase_cpu_seconds CPU time of each run phase",
+                  "# TYPE env_creds_phase_cpu_seconds gauge"]
+        lines += [f'env_creds_phase_cpu_seconds{{phase="{name}"}} {entry["cpu"]:.6f}'
+                  for name, entry in self.phases.items()]
+
+        for metric, histogram, help_text in (("env_creds_host_connect_seconds", self.connect, "connect"),
+                                             ("env_creds_host_getter_seconds", self.getter, "getter")):
+            lines += [f"# HELP {metric} Per host {help_text} latency", f"# TYPE {metric} histogram"]
+            lines += [f'{metric}_bucket{{le="{bound}"}} {count}' for bound, count in histogram.cumulative()]
+            lines += [f"{metric}_sum {histogram.sum:.6f}", f"{metric}_count {histogram.count}"]
+
+        lines += ["# HELP env_creds_host_failures_total Hosts which failed",
+                  "# TYPE env_creds_host_failures_total counter",
+                  f"env_creds_host_failures_total {self.failures}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix):
+        """
+        Write <prefix>.json, <prefix>.prom (Prometheus text format) and a <prefix>_<phase>.pstats file for each
+        profiled phase.
+
+        :return: list of files written
+        """
+        files = [f"{prefix}.json", f"{prefix}.prom"]
+        with open(files[0], "w") as f:
+            json.dump(self.dict(), f, indent=4)
+        with open(files[1], "w") as f:
+            f.write(self.prometheus())
+        for name, profiler in self.profiles.items():
+            files.append(f"{prefix}_{name}.pstats")
+            profiler.dump_stats(files[-1])
+        return files